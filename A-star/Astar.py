@@ -11,45 +11,510 @@
 #               Here the name ai of an action is a string.
 
 import time
-import queue
+import heapq
 import itertools
 
 DEBUG=False
 #DEBUG=True
 ff = 0
 
+# Follow the predecessor links from a goal state back to the initial
+# state, and return the states on the path in the order they are visited.
+
+def extractPlan(predecessor,goalstate):
+    plan = []
+    state = goalstate
+    while state is not None:
+        plan.append(state)
+        state = predecessor[state]
+    plan.reverse()
+    return plan
+
 # A*
+#
+# The OPEN list is a binary heap of entries (f,-g,n,state). Ties between
+# equal f-values are broken in favour of the larger g (the state closer
+# to a goal), and then by a running counter n in FIFO order, so that the
+# states themselves never need to be compared.
+# Decreasing the key of a state is done lazily: a new entry is pushed,
+# and the old, more expensive entry is ignored when it is later popped,
+# because by then the state is already in CLOSED.
+# A state in CLOSED is reopened if a cheaper path to it is found, which
+# can only happen if h is not consistent.
+# The search terminates when a goal state is popped from OPEN, at which
+# point its cost is optimal if h is admissible.
+# The cost is printed unless verbose is False, which is for searches that
+# are a part of another algorithm, like the group searches of ODID.
 
-def ASTAR(initialstate,goaltest,h):
-    visited = dict() # dictionary for visited states (OPEN U CLOSED)
+def ASTAR(initialstate,goaltest,h,stats=None,verbose=True):
     predecessor = dict() # dictionary for predecessors
     g = dict() # dictionary for holding cost-so-far
-    f = dict()
+    closed = set() # expanded states (CLOSED)
+    counter = itertools.count() # tie-breaker for the heap entries
+    expansions = 0 # number of expanded states
+    generated = 0 # number of generated states
+    duplicates = 0 # number of generated states not improving on a known path
+    peakopen = 1 # maximum size of OPEN
 
-    q = queue.PriorityQueue()
-    q.put((h(initialstate), initialstate))
+    if stats is not None:
+        stats.start("A*")
+        h = stats.timedH(h)
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
+
+    OPEN = [ (h(initialstate), 0, next(counter), initialstate) ]
     predecessor[initialstate] = None
     g[initialstate] = 0
-    f[initialstate] = h(initialstate)
-    visited[initialstate] = 1
-    goalcost = float("inf")
 
-    while not q.empty():
-        x, current = q.get()
-        if(x < goalcost):
-            for a,state,cost in current.successors():
-                new_cost = g[current] + cost
-                if (state not in g.keys()):
-                    g[state] = new_cost
-                    predecessor[state] = current
-                    priority = new_cost + h(state)
-                    q.put((priority,state))
-                    if(goaltest(state)):
-                        goalcost = new_cost
-    print(goalcost)
-    return (predecessor, goalcost)
+    plan = []
+    goalcost = float("inf")
+    while OPEN:
+        x, mg, n, current = heapq.heappop(OPEN)
+        if current in closed:
+            continue # stale entry, the state was reached more cheaply
+        if goaltest(current):
+            goalcost = g[current]
+            plan = extractPlan(predecessor,current)
+            break
+        closed.add(current)
+        expansions += 1
+        if DEBUG:
+            print("Expanding state " + str(current) + " f = " + str(x))
+        gcurrent = g[current]
+        for a,state,cost in successors(current):
+            generated += 1
+            new_cost = gcurrent + cost
+            if state in g and g[state] <= new_cost:
+                duplicates += 1
+                continue # not better than a known path
+            g[state] = new_cost
+            predecessor[state] = current
+            closed.discard(state) # reopen if it had been expanded
+            heapq.heappush(OPEN, (new_cost + h(state), -new_cost, next(counter), state))
+        if len(OPEN) > peakopen:
+            peakopen = len(OPEN)
+    if verbose:
+        print(goalcost)
+    if stats is not None:
+        stats.finish(goalcost,expansions,generated,duplicates,peakopen,g,predecessor,closed)
+        return (plan, goalcost, stats)
+    return (plan, goalcost)
 
 # ASTAR returns a pair (plan,cost)
 # where
 #   plan is the sequence of states on an optimal path to goals,
 #   cost is the sum of the costs of actions on that path.
+# If no goal state is reachable, plan is empty and cost is infinite.
+# If a searchstats.SearchStats object is given as stats, it is filled in
+# and ASTAR returns the triple (plan,cost,stats) instead.
+
+# IDA* (Iterative Deepening A*)
+#
+# A sequence of depth-first searches, each of which follows a path only as
+# long as f = g + h of its last state is at most a bound. The first bound
+# is h of the initial state, and each next bound is the smallest f-value
+# that exceeded the previous one. With an admissible h, the first goal
+# state reached has an optimal cost.
+#
+# Only the current path is stored, with a set of the states on it so that
+# cycles are not followed, and for each state on it an iterator over its
+# remaining successors. Memory is therefore linear in the length of the
+# path, at the cost of expanding states again in every iteration, and
+# again whenever they are reached through different paths.
+# The latter can be reduced with a transposition table of at most ttsize
+# states and the smallest g with which each was reached in the current
+# iteration: a state reached again with no smaller g is not expanded
+# again. When the table is full, no new states are added to it.
+# With ttsize = 0 no table is used.
+# IDASTAR returns (plan,cost), or (plan,cost,stats), and prints the cost
+# unless verbose is False, like ASTAR.
+
+def IDASTAR(initialstate,goaltest,h,ttsize=0,stats=None,verbose=True):
+    expansions = 0 # number of expanded states
+    generated = 0 # number of generated states
+    duplicates = 0 # number of generated states on the path or in the table
+    peakpath = 1 # maximum length of the path
+
+    if stats is not None:
+        stats.start("IDA*")
+        h = stats.timedH(h)
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
+
+    plan = []
+    goalcost = float("inf")
+    table = dict()
+    if goaltest(initialstate):
+        plan = [ initialstate ]
+        goalcost = 0
+    bound = h(initialstate)
+    while goalcost == float("inf") and bound < float("inf"):
+        if DEBUG:
+            print("IDA* bound " + str(bound))
+        nextbound = float("inf")
+        table.clear()
+        path = [ initialstate ]
+        onpath = { initialstate }
+        gs = [ 0 ]
+        iterators = [ iter(successors(initialstate)) ]
+        expansions += 1
+        while iterators:
+            try:
+                a,state,cost = next(iterators[-1])
+            except StopIteration:
+                iterators.pop()
+                gs.pop()
+                onpath.discard(path.pop())
+                continue
+            generated += 1
+            if state in onpath:
+                duplicates += 1
+                continue
+            new_cost = gs[-1] + cost
+            f = new_cost + h(state)
+            if f > bound:
+                nextbound = min(nextbound,f)
+                continue
+            if ttsize > 0:
+                if state in table and table[state] <= new_cost:
+                    duplicates += 1
+                    continue
+                if state in table or len(table) < ttsize:
+                    table[state] = new_cost
+            path.append(state)
+            if goaltest(state):
+                plan = path
+                goalcost = new_cost
+                break
+            onpath.add(state)
+            gs.append(new_cost)
+            iterators.append(iter(successors(state)))
+            expansions += 1
+            if len(path) > peakpath:
+                peakpath = len(path)
+        bound = nextbound
+    if verbose:
+        print(goalcost)
+    if stats is not None:
+        stats.finish(goalcost,expansions,generated,duplicates,peakpath,table)
+        return (plan, goalcost, stats)
+    return (plan, goalcost)
+
+# Weighted A*
+#
+# Like ASTAR, but the states in OPEN are ordered by g + w*h. With w > 1
+# states near the goal are preferred, so a solution is usually found much
+# faster, and its cost is at most w times the optimal cost.
+# States with g + h >= costbound are not added to OPEN, because they can
+# not lead to a solution cheaper than one that is already known.
+# If stoptime (a value of time.perf_counter()) is passed, the search stops.
+# Returns (plan,cost,lowerbound), where lowerbound is a lower bound for the
+# cost of any solution cheaper than costbound: the smallest g + h in OPEN,
+# or costbound if OPEN became empty.
+
+def weightedASTAR(initialstate,goaltest,h,w,costbound=float("inf"),stoptime=None):
+    predecessor = dict() # dictionary for predecessors
+    g = dict() # dictionary for holding cost-so-far
+    closed = set() # expanded states (CLOSED)
+    counter = itertools.count() # tie-breaker for the heap entries
+    expansions = 0 # number of expanded states
+
+    hinit = h(initialstate)
+    OPEN = [ (w * hinit, 0, next(counter), initialstate, hinit) ]
+    predecessor[initialstate] = None
+    g[initialstate] = 0
+
+    plan = []
+    goalcost = float("inf")
+    while OPEN:
+        x, mg, n, current, hcurrent = heapq.heappop(OPEN)
+        if current in closed:
+            continue # stale entry, the state was reached more cheaply
+        if goaltest(current):
+            goalcost = g[current]
+            plan = extractPlan(predecessor,current)
+            heapq.heappush(OPEN, (x, mg, n, current, hcurrent))
+            break
+        # The state is put back to OPEN before it is closed, so that it
+        # is counted in the lower bound below.
+        if stoptime is not None and expansions % 256 == 0 and time.perf_counter() > stoptime:
+            heapq.heappush(OPEN, (x, mg, n, current, hcurrent))
+            break
+        closed.add(current)
+        expansions += 1
+        gcurrent = g[current]
+        for a,state,cost in current.successors():
+            new_cost = gcurrent + cost
+            if state in g and g[state] <= new_cost:
+                continue # not better than a known path
+            hstate = h(state)
+            if new_cost + hstate >= costbound:
+                continue # not better than the known solution
+            g[state] = new_cost
+            predecessor[state] = current
+            closed.discard(state) # reopen if it had been expanded
+            heapq.heappush(OPEN, (new_cost + w * hstate, -new_cost, next(counter), state, hstate))
+
+    lowerbound = costbound
+    for x, mg, n, state, hstate in OPEN:
+        if state not in closed and g[state] == -mg:
+            lowerbound = min(lowerbound, hstate - mg)
+    return (plan, goalcost, lowerbound)
+
+# Anytime weighted A*
+#
+# Weighted A* is run first with the weight w, and then again with weights
+# decreased by delta at a time, down to 1. Every run only looks for plans
+# cheaper than the best one found so far, and each time a cheaper plan is
+# found or the bound becomes smaller, the best plan is passed to the
+# function report, if given, as
+#   report(plan,cost,bound)
+# where bound is a guaranteed suboptimality factor: cost <= bound * optimal
+# cost. The bound is computed from the smallest g + h in OPEN at the end of
+# each run, so it is often much smaller than the weight, and it can become
+# smaller also in runs that find no cheaper plan.
+# The search ends when a run with w = 1 completes, when the bound becomes 1,
+# or when timelimit seconds of wall-clock time have passed.
+# Returns (plan,cost,bound) for the best plan found. If no plan was found
+# in time, plan is empty and cost and bound are infinite.
+
+def anytimeASTAR(initialstate,goaltest,h,w=3.0,delta=0.5,timelimit=None,report=None):
+    stoptime = None
+    if timelimit is not None:
+        stoptime = time.perf_counter() + timelimit
+    plan = []
+    goalcost = float("inf")
+    bound = float("inf")
+    while True:
+        newplan,newcost,lowerbound = weightedASTAR(initialstate,goaltest,h,w,goalcost,stoptime)
+        oldbound = bound
+        if newcost < goalcost:
+            plan,goalcost = newplan,newcost
+        lowerbound = min(lowerbound,goalcost)
+        if goalcost == 0:
+            bound = 1.0
+        elif lowerbound > 0:
+            bound = min(bound,goalcost / lowerbound)
+        if DEBUG:
+            print("w = " + str(w) + ": cost " + str(goalcost) + ", bound " + str(bound))
+        if report is not None and (newcost < float("inf") or bound < oldbound):
+            report(plan,goalcost,bound)
+        if w <= 1.0 or bound <= 1.0 or (stoptime is not None and time.perf_counter() > stoptime):
+            break
+        w = max(1.0,w - delta)
+    print(goalcost)
+    return (plan, goalcost, bound)
+
+# Beam search
+#
+# Breadth-first search that keeps only the 'width' best states of each
+# layer, ordered by g + h, and forgets the rest. States already kept in
+# earlier layers are not kept again. At most width states are stored for
+# each layer, so the memory needed is bounded by width times the length
+# of the plan. When goal states are generated, the cheapest of them is
+# returned. The plan need not be optimal, and none may be found even if
+# one exists, because the states leading to it can be forgotten.
+# BEAMSEARCH returns (plan,cost) like ASTAR.
+
+def BEAMSEARCH(initialstate,goaltest,h,width):
+    predecessor = { initialstate : None } # kept states and their predecessors
+    g = { initialstate : 0 } # cost-so-far of the kept states
+    counter = itertools.count() # tie-breaker for equal f-values
+
+    plan = []
+    goalcost = float("inf")
+    if goaltest(initialstate):
+        plan = [ initialstate ]
+        goalcost = 0
+    layer = [ initialstate ]
+    while layer and goalcost == float("inf"):
+        candidates = dict() # state -> (cost-so-far,predecessor)
+        for current in layer:
+            for a,state,cost in current.successors():
+                if state in g:
+                    continue # kept in an earlier layer
+                new_cost = g[current] + cost
+                if state not in candidates or new_cost < candidates[state][0]:
+                    candidates[state] = (new_cost,current)
+        goals = [ (c,s) for s,(c,p) in candidates.items() if goaltest(s) ]
+        if goals:
+            c,s = min(goals,key=lambda e: e[0])
+            predecessor[s] = candidates[s][1]
+            goalcost = c
+            plan = extractPlan(predecessor,s)
+            break
+        best = heapq.nsmallest(width,((c + h(s),next(counter),s) for s,(c,p) in candidates.items()))
+        layer = []
+        for f,n,s in best:
+            g[s],predecessor[s] = candidates[s]
+            layer.append(s)
+    print(goalcost)
+    return (plan, goalcost)
+
+# SMA* (Simplified Memory-bounded A*)
+#
+# A* that keeps at most 'maxnodes' nodes in memory. Successors are
+# generated one at a time, the one with the smallest f first, and when the
+# memory is full, the leaf node with the largest f, the shallowest one of
+# those, is forgotten. Its f-value is remembered by its parent, which can
+# generate it again if all other alternatives turn out to be worse.
+# The f-values are backed up from the children to their parents: the f of
+# a node is the smallest f of its children, and of the successors not
+# currently in memory. A node that is at the maximum depth maxnodes-1 and
+# is not a goal gets f = infinity, because a path through it would not fit
+# in memory. Cycles on the path from the root are not followed, and a
+# successor is not generated if its state is already in memory with a
+# cost-so-far that is not larger.
+#
+# The next node is selected by the smallest f of the successors it can
+# still generate, the deepest first. If the selected node is a goal, its
+# path is returned. This is optimal if the optimal path fits in memory.
+# SMASTAR returns (plan,cost) like ASTAR.
+
+class SMANode:
+
+    __slots__ = ("state","g","f","depth","parent","index","children","successors","pending","version")
+
+    def __init__(self,state,g,f,depth,parent,index):
+        self.state = state
+        self.g = g
+        self.f = f # backed-up f-value
+        self.depth = depth
+        self.parent = parent
+        self.index = index # the number of this node among the successors of the parent
+        self.children = [] # children in memory
+        self.successors = None # [ (state,cost) ] once expanded
+        self.pending = None # heap of (f,i) for the successors i not in memory
+        self.version = 0
+
+    # The f-value by which the node is selected: its own if it has not
+    # been expanded, or the best of the successors it can generate.
+
+    def key(self):
+        if self.successors is None:
+            return self.f
+        return self.pending[0][0]
+
+def SMASTAR(initialstate,goaltest,h,maxnodes):
+    counter = itertools.count() # tie-breaker for the heap entries
+    best = [] # heap of (key,-depth,n,version,node) for nodes that can generate successors
+    worst = [] # heap of (-f,depth,n,version,node) for leaf nodes
+    nodes = 1 # number of nodes in memory
+
+    def update(node):
+        node.version += 1
+        if node.successors is None or node.pending:
+            heapq.heappush(best, (node.key(), -node.depth, next(counter), node.version, node))
+        if not node.children and node.parent is not None:
+            heapq.heappush(worst, (-node.f, node.depth, next(counter), node.version, node))
+
+    # Back up f-values from children to parents
+
+    def backup(node):
+        while node is not None and node.successors is not None:
+            values = [ c.f for c in node.children ]
+            if node.pending:
+                values.append(node.pending[0][0])
+            newf = min(values) if values else float("inf")
+            if newf <= node.f:
+                break
+            node.f = newf
+            update(node)
+            node = node.parent
+
+    root = SMANode(initialstate,0,h(initialstate),0,None,None)
+    known = { initialstate : root } # state -> the cheapest node in memory for it
+    update(root)
+    while best:
+        key, md, n, version, node = heapq.heappop(best)
+        if version != node.version or not (node.successors is None or node.pending):
+            continue # stale entry
+        if key == float("inf"):
+            break # no solution fits in memory
+        if node.successors is None and goaltest(node.state):
+            goalcost = node.g
+            plan = []
+            while node is not None:
+                plan.append(node.state)
+                node = node.parent
+            plan.reverse()
+            print(goalcost)
+            return (plan, goalcost)
+        if node.successors is None:
+            ancestors = set()
+            a = node
+            while a is not None:
+                ancestors.add(a.state)
+                a = a.parent
+            node.successors = []
+            node.pending = []
+            for a,state,cost in node.state.successors():
+                if state in ancestors:
+                    continue # cycle
+                g = node.g + cost
+                if node.depth + 1 >= maxnodes - 1 and not goaltest(state):
+                    f = float("inf")
+                else:
+                    f = max(node.f, g + h(state))
+                node.pending.append((f,len(node.successors)))
+                node.successors.append((state,cost))
+            heapq.heapify(node.pending)
+            if not node.pending:
+                node.f = float("inf")
+                update(node)
+                backup(node.parent)
+                continue
+
+        # Generate the best successor not in memory
+
+        f,i = heapq.heappop(node.pending)
+        state,cost = node.successors[i]
+        if state in known and known[state].g <= node.g + cost:
+            update(node) # reached at least as cheaply through another node
+            backup(node)
+            continue
+        child = SMANode(state,node.g + cost,f,node.depth + 1,node,i)
+        node.children.append(child)
+        known[state] = child
+        nodes += 1
+        update(node)
+        update(child)
+        backup(node)
+
+        # Forget the worst leaves if the memory is full
+
+        kept = [] # the entry of the new child, which is not forgotten at once
+        while nodes > maxnodes and worst:
+            entry = heapq.heappop(worst)
+            mf, depth, n, version, leaf = entry
+            if version != leaf.version or leaf.children or leaf.parent is None:
+                continue
+            if leaf is child:
+                kept.append(entry)
+                continue
+            parent = leaf.parent
+            if leaf not in parent.children:
+                continue # already forgotten
+            parent.children.remove(leaf)
+            if known.get(leaf.state) is leaf:
+                del known[leaf.state]
+            heapq.heappush(parent.pending, (leaf.f,leaf.index))
+            leaf.version += 1
+            nodes -= 1
+            update(parent)
+        for entry in kept:
+            heapq.heappush(worst, entry)
+
+        # Remove stale entries if the heaps have grown much larger than the tree
+
+        if len(best) + len(worst) > 8 * maxnodes:
+            live = [ e for e in best if e[3] == e[4].version ]
+            heapq.heapify(live)
+            best[:] = live
+            live = [ e for e in worst if e[3] == e[4].version ]
+            heapq.heapify(live)
+            worst[:] = live
+    print(float("inf"))
+    return ([], float("inf"))
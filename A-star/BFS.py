@@ -13,54 +13,339 @@
 
 import time
 import queue
-import itertools
+import multiprocessing
 
 # Enable debugging output
 
 DEBUG = False
 #DEBUG = True
 
+# Only the predecessor of each visited state is stored during the search,
+# not the path leading to it. When the goal is reached, the path is
+# followed back to the initial state, and the name of each action is
+# found again from the successors of its predecessor. This is done only
+# for the states on the path, so the extra calls to successors() are few,
+# and the memory needed is one dictionary entry for each visited state.
+# The successors are (name,state,cost), or (name,state) in state spaces
+# without costs, like the knight problems, so only the first two are used.
+
+def actionBetween(state,nextstate):
+    for successor in state.successors():
+        if successor[1] == nextstate:
+            return successor[0]
+    return None
+
+def extractActions(predecessor,goalstate):
+    states = []
+    state = goalstate
+    while state is not None:
+        states.append(state)
+        state = predecessor[state]
+    states.reverse()
+    return [ actionBetween(s1,s2) for s1,s2 in zip(states,states[1:]) ]
+
 # Breadth-First Search (uninformed)
 
-def breadthFirstSearch(initialstate,goaltest):
+def breadthFirstSearch(initialstate,goaltest,stats=None):
     statExpansions = 0 # number of expanded states
     statVisits = 0 # number of encountered states
+    statGenerated = 0 # number of generated states
+    statDuplicates = 0 # number of generated states that had been visited
+    statPeakQueue = 1 # maximum length of the queue
 
     starttime = time.process_time()
+    if stats is not None:
+        stats.start("BFS")
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
 
     if(goaltest(initialstate)):
        print("Initial state is a goal state, terminating...")
-       return
+       if stats is not None:
+           stats.finish(0,0,0,0,0)
+           return ([], stats)
+       return []
     
-    visited = dict() # dictionary (hash table) for holding visited states
-    predecessor = dict() # dictionary (hash table) for holding predecessors
+    predecessor = dict() # dictionary (hash table) for holding visited states and their predecessors
         
     Q = queue.Queue(maxsize=0) # first-in-first-out queue
 
     print("BFS: Initial state is " + str(initialstate))
-    Q.put( (initialstate,[]) ) # Insert the initial state in the queue
-    visited[initialstate] = 1
+    Q.put(initialstate) # Insert the initial state in the queue
+    predecessor[initialstate] = None
     
-    while not Q.empty():
-        state,path = Q.get() # Next un-expanded state from the queue
+    result = None
+    while result is None and not Q.empty():
+        state = Q.get() # Next un-expanded state from the queue
         if DEBUG:
             print("Expanding state " + str(state))
         statExpansions += 1
-        for aname,s,cost in state.successors(): # Go through all successors of state
-            if s not in visited: # Is state in the dictionary?
+        for aname,s,cost in successors(state): # Go through all successors of state
+            statGenerated += 1
+            if s not in predecessor: # Is state in the dictionary?
                 predecessor[s] = state
                 if DEBUG:
                     print("New state " + str(s))
                 statVisits += 1
                 if goaltest(s):
+                    result = extractActions(predecessor,s)
                     print("Goal state " + str(s) + " reached")
                     endtime = time.process_time()
-                    print(str(statExpansions) + " expansions, " + str(statVisits) + " visits " + str(len(path + [aname])) + " actions in solution path")
-                    print(path + [aname])
+                    print(str(statExpansions) + " expansions, " + str(statVisits) + " visits " + str(len(result)) + " actions in solution path")
+                    print(result)
                     print("Elapsed time ",str(endtime-starttime))
                     print()
-                    return
-                visited[s] = 1
-                Q.put( (s,path + [aname] ) )
-    print("All states visited")
+                    break
+                Q.put(s)
+            else:
+                statDuplicates += 1
+        statPeakQueue = max(statPeakQueue,Q.qsize())
+    if result is None:
+        print("All states visited")
+    if stats is not None:
+        if result is None:
+            cost = None
+        else:
+            cost = len(result)
+        stats.finish(cost,statExpansions,statGenerated,statDuplicates,statPeakQueue,predecessor)
+        return (result, stats)
+    return result
+
+# breadthFirstSearch returns the list of the names of the actions
+# on a shortest path to a goal state, or None if no goal state is
+# reachable. If a searchstats.SearchStats object is given as stats,
+# it is filled in and the pair (path,stats) is returned instead.
+
+# Bidirectional Breadth-First Search (uninformed)
+#
+# If there is a single goal state and every action can be reversed, that is,
+# if s2 is a successor of s1 iff s1 is a successor of s2, the search can
+# proceed both forward from the initial state and backward from the goal
+# state. The frontier that is smaller is extended by one full layer at a
+# time, and the search ends when a newly reached state has already been
+# reached from the other direction. The first such state is on a shortest
+# path. If the shortest path has d actions and each state has b successors,
+# only about 2*b^(d/2) states are reached instead of b^d.
+#
+# The forward search remembers for each state its predecessor, and the
+# backward search remembers for each state the next state towards the goal.
+# The actions are found from the successors of the states on the path, as
+# in breadthFirstSearch.
+
+def bidirectionalBFS(initialstate,goalstate,stats=None):
+    statExpansions = 0 # number of expanded states
+    statGenerated = 0 # number of generated states
+    statDuplicates = 0 # number of generated states that had been visited
+    statPeakQueue = 2 # maximum size of the two frontiers
+
+    starttime = time.process_time()
+    if stats is not None:
+        stats.start("bidirectional BFS")
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
+
+    forward = { initialstate : None } # state -> predecessor
+    backward = { goalstate : None } # state -> next state towards goal
+    forwardFrontier = [ initialstate ]
+    backwardFrontier = [ goalstate ]
+
+    print("Bidirectional BFS: Initial state is " + str(initialstate))
+    meet = None
+    if initialstate == goalstate:
+        meet = initialstate
+    while meet is None and forwardFrontier and backwardFrontier:
+        isForward = len(forwardFrontier) <= len(backwardFrontier)
+        if isForward:
+            frontier,visited,other = forwardFrontier,forward,backward
+        else:
+            frontier,visited,other = backwardFrontier,backward,forward
+        newFrontier = []
+        for state in frontier:
+            if DEBUG:
+                print("Expanding state " + str(state))
+            statExpansions += 1
+            for aname,s,cost in successors(state):
+                statGenerated += 1
+                if s in visited:
+                    statDuplicates += 1
+                    continue
+                visited[s] = state
+                if s in other:
+                    meet = s
+                    break
+                newFrontier.append(s)
+            if meet is not None:
+                break
+        if isForward:
+            forwardFrontier = newFrontier
+        else:
+            backwardFrontier = newFrontier
+        statPeakQueue = max(statPeakQueue,len(forwardFrontier) + len(backwardFrontier))
+
+    path = None
+    if meet is None:
+        print("All states visited")
+    else:
+        path = extractActions(forward,meet)
+        state = meet
+        while backward[state] is not None:
+            path.append(actionBetween(state,backward[state]))
+            state = backward[state]
+        endtime = time.process_time()
+        print("Goal state " + str(goalstate) + " reached")
+        print(str(statExpansions) + " expansions, " + str(len(forward) + len(backward)) + " visits " + str(len(path)) + " actions in solution path")
+        print(path)
+        print("Elapsed time ",str(endtime-starttime))
+        print()
+    if stats is not None:
+        if path is None:
+            cost = None
+        else:
+            cost = len(path)
+        stats.finish(cost,statExpansions,statGenerated,statDuplicates,statPeakQueue,forward,backward)
+        return (path, stats)
+    return path
+
+# bidirectionalBFS returns the list of the names of the actions on a
+# shortest path from the initial state to the goal state, like
+# breadthFirstSearch.
+
+# Parallel Breadth-First Search (uninformed)
+#
+# The search proceeds one layer at a time, and the states are divided
+# between a number of worker processes by their hash values: the state s
+# is owned by the worker hash(s) % processes. Each worker has its own part
+# of the visited states and their predecessors, and expands the states of
+# the current layer it owns. The successors are sent, together with their
+# predecessors, to their owners, which remove the states they have already
+# visited and keep the rest as their part of the next layer. A goal state
+# is found by its owner, and the path to it is followed back by asking the
+# owner of each state on it for its predecessor.
+#
+# The states and the hash values must be the same in all processes: hash
+# values of integers and tuples of integers are, but those of strings are
+# not unless the processes are forked or PYTHONHASHSEED is set. The goal
+# test is passed to the workers when they are created, so it need not be
+# picklable when the processes are forked, which is the default on Linux.
+# The states must be picklable in any case. The successors may be pairs
+# (name,state) like in the knight problems, which use this search too.
+
+def ownerOf(state,processes):
+    return hash(state) % processes
+
+def parallelBFSWorker(i,processes,initialstate,goaltest,control,inboxes,results):
+    predecessor = dict() # visited states owned by this worker and their predecessors
+    layer = []
+    if ownerOf(initialstate,processes) == i:
+        predecessor[initialstate] = None
+        layer.append(initialstate)
+    while True:
+        command,arg = control.get()
+        if command == "stop":
+            return
+        if command == "predecessor":
+            results.put(predecessor[arg])
+            continue
+
+        # Expand the states of the current layer, and distribute the successors
+
+        # Each successor is sent only once, with the first predecessor found
+
+        batches = [ dict() for j in range(0,processes) ]
+        generated = 0
+        for state in layer:
+            for successor in state.successors():
+                s = successor[1]
+                generated += 1
+                j = ownerOf(s,processes)
+                if j == i and s in predecessor:
+                    continue
+                if s not in batches[j]:
+                    batches[j][s] = state
+        for j in range(0,processes):
+            if j != i:
+                inboxes[j].put(list(batches[j].items()))
+        received = [ batches[i].items() ] + [ inboxes[i].get() for j in range(1,processes) ]
+
+        # The new states owned by this worker form its part of the next layer
+
+        layer = []
+        goal = None
+        for batch in received:
+            for s,state in batch:
+                if s not in predecessor:
+                    predecessor[s] = state
+                    layer.append(s)
+                    if goal is None and goaltest(s):
+                        goal = s
+        results.put((i,generated,len(layer),goal))
+
+# The next result from the workers. If a worker has died, for example
+# because it ran out of memory, the search cannot continue.
+
+def parallelResult(results,workers):
+    while True:
+        try:
+            return results.get(timeout=1.0)
+        except queue.Empty:
+            if not all(w.is_alive() for w in workers):
+                raise RuntimeError("a worker process of parallelBFS has died")
+
+def parallelBFS(initialstate,goaltest,processes=None):
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    statExpansions = 0 # number of expanded states
+    statVisits = 0 # number of encountered states
+
+    starttime = time.perf_counter() # wall time, the work is done in the workers
+
+    if(goaltest(initialstate)):
+       print("Initial state is a goal state, terminating...")
+       return []
+
+    control = [ multiprocessing.Queue() for i in range(0,processes) ]
+    inboxes = [ multiprocessing.Queue() for i in range(0,processes) ]
+    results = multiprocessing.Queue()
+    workers = [ multiprocessing.Process(target=parallelBFSWorker,
+                                        args=(i,processes,initialstate,goaltest,control[i],inboxes,results))
+                for i in range(0,processes) ]
+    for w in workers:
+        w.start()
+
+    print("Parallel BFS: Initial state is " + str(initialstate) + ", " + str(processes) + " processes")
+    layersize = 1
+    goal = None
+    while goal is None and layersize > 0:
+        statExpansions += layersize
+        for c in control:
+            c.put(("expand",None))
+        reports = sorted([ parallelResult(results,workers) for i in range(0,processes) ], key=lambda r: r[0])
+        layersize = sum(r[2] for r in reports)
+        statVisits += layersize
+        for i,generated,size,g in reports:
+            if g is not None and goal is None:
+                goal = g
 
+    path = None
+    if goal is None:
+        print("All states visited")
+    else:
+        states = [ goal ]
+        while states[-1] != initialstate:
+            control[ownerOf(states[-1],processes)].put(("predecessor",states[-1]))
+            states.append(parallelResult(results,workers))
+        states.reverse()
+        path = [ actionBetween(s1,s2) for s1,s2 in zip(states,states[1:]) ]
+        endtime = time.perf_counter()
+        print("Goal state " + str(goal) + " reached")
+        print(str(statExpansions) + " expansions, " + str(statVisits) + " visits " + str(len(path)) + " actions in solution path")
+        print(path)
+        print("Elapsed time ",str(endtime-starttime))
+        print()
+    for c in control:
+        c.put(("stop",None))
+    for w in workers:
+        w.join()
+    return path
@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+
+# Multi-Agent Path planning with Conflict-Based Search (CBS).
+#
+# CBS searches a constraint tree. Every node of the tree has a set of
+# constraints for every agent, and a path for every agent that is optimal
+# for that agent alone under its constraints. The node with the smallest
+# sum of the path costs is chosen next. If its paths have no conflicts,
+# they are an optimal solution. Otherwise the first conflict between two
+# agents is resolved by creating two children, each forbidding the
+# conflicting move to one of the two agents, and replanning that agent.
+#
+# The conflicts are those forbidden by MAPPGridState.successors:
+#   vertex conflict: two agents in the same cell at the same time,
+#   swap conflict: two agents exchange their cells in one time step.
+# An agent that has reached the end of its path stays at its goal.
+# Moves cost 1.0 and waiting costs 0.0, so the cost of a plan is the
+# number of moves made by all agents, as with MAPPGridState.
+#
+# Because waiting is free, a conflict can often be resolved by delaying
+# one of the agents without increasing the cost, which only moves the
+# conflict to a later time. Two agents that must pass each other in a
+# narrow space then produce a huge number of nodes of the same cost.
+# Therefore agents that have conflicted more than 'mergebound' times are
+# merged into a group that is planned jointly, like in ODID, and whose
+# members are no longer constrained with respect to each other
+# (Meta-Agent CBS).
+
+import heapq
+import itertools
+
+from MAPP import MAPPGridState, getMAPPGrid, goalDistances
+from ODID import positionsAt
+
+# A* in space and time for a group of agents.
+#
+# One agent of the group moves at a time, as in ODID, and the time of the
+# last complete time step is a part of the state.
+# vertex[i] is a set of pairs (cell,t) the agent i of the group must not
+# be in, and edge[i] is a set of triples (c0,c1,t) for moves from c0 to c1
+# the agent must not make between t-1 and t.
+# The goal is reached when all agents are in their goal cells and no later
+# vertex constraint forces any of them to leave.
+# Among paths of equal cost, the one that enters the fewest cells used by
+# other agents at the same time is preferred: others are the paths of the
+# agents outside the group. This does not affect the cost, but it makes
+# conflicts, and therefore nodes of the constraint tree, much less frequent.
+# After the last constraint, and after the other agents have reached their
+# goals, the time no longer matters, so all later times are represented
+# by one time. This keeps the state space finite even though waiting is free.
+# Returns the list of the cells of each agent at the times 0,1,2,...,
+# and the cost of the paths.
+
+def spaceTimeASTAR(grid,starts,goals,distances,vertex,edge,others):
+    goalT = -1
+    endT = max([1] + [ len(p) for p in others ])
+    for i in range(0,len(goals)):
+        for c,t in vertex[i]:
+            endT = max(endT,t+1)
+            if c == goals[i]:
+                goalT = max(goalT,t)
+        for c0,c1,t in edge[i]:
+            endT = max(endT,t+1)
+    occupied = [ { positionsAt(p,t) for p in others } for t in range(0,endT+1) ]
+    goalpositions = tuple(goals)
+    k = len(goals)
+    moves = grid.moves
+
+    # A state is (positions,moved,t) where moved holds the cells the first
+    # len(moved) agents occupied before they moved in the current time step,
+    # as in ODState.
+
+    counter = itertools.count()
+    initial = (tuple(starts),(),0)
+    g = { initial : (0,0) } # (cost,conflicts)
+    predecessor = { initial : None }
+    closed = set()
+    OPEN = [ (sum(d[c] for d,c in zip(distances,starts)), 0, 0, next(counter), initial) ]
+    while OPEN:
+        f, conflicts, mg, n, current = heapq.heappop(OPEN)
+        if current in closed:
+            continue
+        positions,moved,t = current
+        i = len(moved)
+        if i == 0 and t > goalT and positions == goalpositions:
+            steps = []
+            while current is not None:
+                if len(current[1]) == 0:
+                    steps.append(current[0])
+                current = predecessor[current]
+            steps.reverse()
+            paths = [ [ cells[a] for cells in steps ] for a in range(0,k) ]
+            return (paths, g[(positions,moved,t)][0])
+        closed.add(current)
+        t2 = t + 1
+        o = positions[i]
+        hcurrent = f + mg
+        gcost,gconflicts = g[current]
+        for c2,a,cost in moves[o]:
+            if c2 in positions[0:i]:
+                continue # Double occupancy
+            if c2 in moved and positions[moved.index(c2)] == o:
+                continue # Agents swapped positions
+            if (c2,t2) in vertex[i] or (o,c2,t2) in edge[i]:
+                continue
+            newpositions = positions[0:i] + (c2,) + positions[i+1:]
+            if i + 1 == k:
+                successor = (newpositions,(),min(t2,endT))
+            else:
+                successor = (newpositions,moved + (o,),t)
+            new_cost = gcost + cost
+            new_conflicts = gconflicts + (c2 in occupied[min(t2,endT)])
+            if successor in g and g[successor] <= (new_cost,new_conflicts):
+                continue
+            g[successor] = (new_cost,new_conflicts)
+            predecessor[successor] = current
+            closed.discard(successor)
+            h = hcurrent - distances[i][o] + distances[i][c2]
+            heapq.heappush(OPEN, (new_cost + h, new_conflicts, -new_cost, next(counter), successor))
+    return ([], float("inf"))
+
+# The first conflict in the paths of the agents, as a tuple
+#   (t,a1,a2,"vertex",c) or (t,a1,a2,"swap",c1,c2)
+# where a1 moved from c1 to c2 and a2 from c2 to c1 between t-1 and t.
+# The number of conflicting pairs is returned as well, for tie-breaking.
+
+def findConflicts(paths):
+    first = None
+    count = 0
+    T = max(len(p) for p in paths)
+    for t in range(0,T):
+        owner = dict() # cell -> agent at time t
+        moves = dict() # (from,to) -> agent between t-1 and t
+        for a in range(0,len(paths)):
+            c = positionsAt(paths[a],t)
+            if c in owner:
+                count += 1
+                if first is None:
+                    first = (t,owner[c],a,"vertex",c)
+            else:
+                owner[c] = a
+            if t > 0:
+                c0 = positionsAt(paths[a],t-1)
+                if c0 != c:
+                    if (c,c0) in moves:
+                        count += 1
+                        if first is None:
+                            first = (t,moves[(c,c0)],a,"swap",c,c0)
+                    moves[(c0,c)] = a
+    return (first, count)
+
+# Solve a MAPP problem given as the output of createMAPPgrid for the
+# initial and goal locations. Returns (plan,cost) like ASTAR, where plan
+# is a list of MAPPGridStates and cost is the optimal sum of the costs.
+#
+# The numbers of conflicts between pairs of agents are counted over the
+# whole search, and a pair is merged at the first conflict after it has
+# conflicted 'mergebound' times. So the constraint tree is finite.
+#
+# A node of the constraint tree is
+#   (cost,length,conflicts,n,conflict,groups,constraints,paths,costs)
+# where groups is a tuple of tuples of agents planned jointly, and
+# constraints[a] is the pair (vertex,edge) of frozensets for agent a.
+# Every constraint carries as its last component the agent it was
+# created for, so that it can be dropped if the two agents are merged.
+# costs[g] is the cost of the group g. Among nodes of equal cost those
+# with shorter paths and with fewer conflicts come first.
+
+def CBS(initlocations,goallocations,xsize,ysize,walls,mergebound=4):
+    grid = getMAPPGrid(xsize,ysize,walls)
+    starts = [ grid.cell(x,y) for (x,y) in initlocations ]
+    goals = [ grid.cell(x,y) for (x,y) in goallocations ]
+    distances = [ goalDistances(grid,g) for g in goals ]
+    k = len(starts)
+
+    def lowlevel(group,constraints,paths):
+        others = [ paths[b] for b in range(0,k) if b not in group ]
+        vertex = [ { (c,t) for (c,t,b) in constraints[a][0] } for a in group ]
+        edge = [ { (c0,c1,t) for (c0,c1,t,b) in constraints[a][1] } for a in group ]
+        return spaceTimeASTAR(grid,[ starts[a] for a in group ],[ goals[a] for a in group ],
+                              [ distances[a] for a in group ],vertex,edge,others)
+
+    # Replan the group gi of a node, and add the node to OPEN
+
+    def child(groups,constraints,paths,costs,gi):
+        key = (groups,tuple(constraints))
+        if key in seen:
+            return # the same constraints were added in a different order
+        seen.add(key)
+        grouppaths,gcost = lowlevel(groups[gi],constraints,paths)
+        if gcost == float("inf"):
+            return
+        newpaths = list(paths)
+        for a,p in zip(groups[gi],grouppaths):
+            newpaths[a] = p
+        newcosts = costs[0:gi] + (gcost,) + costs[gi+1:]
+        newconflict,newcount = findConflicts(newpaths)
+        heapq.heappush(OPEN, (sum(newcosts), sum(len(p) for p in newpaths), newcount, next(counter),
+                              newconflict, groups, constraints, newpaths, newcosts))
+
+    counter = itertools.count()
+    seen = set() # groups and constraints of the nodes generated so far
+    conflictcounts = dict() # (a1,a2) -> number of conflicts between a1 and a2
+    OPEN = []
+
+    groups = tuple( (a,) for a in range(0,k) )
+    constraints = [ (frozenset(),frozenset()) for a in range(0,k) ]
+    paths = [ [ starts[a] ] for a in range(0,k) ]
+    costs = ()
+    for a in range(0,k):
+        grouppaths,cost = lowlevel((a,),constraints,paths)
+        if cost == float("inf"):
+            return ([], float("inf"))
+        paths[a] = grouppaths[0]
+        costs = costs + (cost,)
+    conflict,count = findConflicts(paths)
+    heapq.heappush(OPEN, (sum(costs), sum(len(p) for p in paths), count, next(counter), conflict, groups, constraints, paths, costs))
+
+    while OPEN:
+        cost, length, count, n, conflict, groups, constraints, paths, costs = heapq.heappop(OPEN)
+        if conflict is None:
+            T = max(len(p) for p in paths)
+            plan = [ MAPPGridState([ grid.coordinates(positionsAt(p,t)) for p in paths ],grid=grid) for t in range(0,T) ]
+            return (plan, cost)
+        a1,a2 = conflict[1],conflict[2]
+        groupof = { a : gi for gi,group in enumerate(groups) for a in group }
+        g1,g2 = groupof[a1],groupof[a2]
+
+        pair = (min(a1,a2),max(a1,a2))
+        conflictcounts[pair] = conflictcounts.get(pair,0) + 1
+        between = sum(conflictcounts.get((min(b1,b2),max(b1,b2)),0) for b1 in groups[g1] for b2 in groups[g2])
+        if between > mergebound:
+            merged = tuple(sorted(groups[g1] + groups[g2]))
+            newgroups = tuple(group for gi,group in enumerate(groups) if gi != g1 and gi != g2) + (merged,)
+            newcosts = tuple(c for gi,c in enumerate(costs) if gi != g1 and gi != g2) + (0,)
+            newconstraints = list(constraints)
+            for a in merged:
+                vertex,edge = constraints[a]
+                newconstraints[a] = (frozenset(v for v in vertex if v[-1] not in merged),
+                                     frozenset(e for e in edge if e[-1] not in merged))
+            child(newgroups,newconstraints,paths,newcosts,len(newgroups)-1)
+            continue
+
+        if conflict[3] == "vertex":
+            t,a1,a2,kind,c = conflict
+            branches = [ (a1,g1,(c,t,a2),None), (a2,g2,(c,t,a1),None) ]
+        else:
+            t,a1,a2,kind,c1,c2 = conflict
+            branches = [ (a1,g1,None,(c1,c2,t,a2)), (a2,g2,None,(c2,c1,t,a1)) ]
+        for a,gi,v,e in branches:
+            vertex,edge = constraints[a]
+            if v is not None:
+                vertex = vertex | { v }
+            if e is not None:
+                edge = edge | { e }
+            newconstraints = constraints[0:a] + [ (vertex,edge) ] + constraints[a+1:]
+            child(groups,newconstraints,paths,costs,gi)
+    return ([], float("inf"))
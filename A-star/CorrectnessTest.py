@@ -14,7 +14,7 @@ import time
 import queue
 import itertools
 
-from Astar import ASTAR
+from Astar import ASTAR, weightedASTAR, anytimeASTAR
 
 # This is a simple test for the A* termination
 # The first path to a goal state is not an optimal one.
@@ -94,10 +94,58 @@ def TermTestH(s):
     else:
         return 0.0
 
-print("CORRECT RESULT: optimal cost is ")
+print("CORRECT RESULT: optimal cost is 3.0")
 print("RUNTIME ESTIMATE: < 1 millisecond")
 plan,cost = ASTAR(TermTestState(),
                   lambda state: (state.state == 0), # goal test
                   TermTestH) # function: distance to goal
 for s in plan:
     print(str(s))
+
+# A test for the lower bound of weighted A* when the time runs out.
+# The chain 1, 2, ..., 300 of cost 0 leads to the goal 0 with a final
+# step of cost 1, and the state -1 costs 3 directly from the start.
+# When the search is stopped at once, the states not expanded must still
+# count in the lower bound, which must not exceed the optimal cost 1.0.
+
+class ChainTestState(TermTestState):
+
+    def successors(self):
+        if self.state == 1:
+            return [ ("1to2",ChainTestState(2),0.0), ("1toX",ChainTestState(-1),3.0) ]
+        elif self.state == 300:
+            return [ ("300toG",ChainTestState(0),1.0) ]
+        elif self.state > 1:
+            return [ (str(self.state) + "to" + str(self.state+1),ChainTestState(self.state+1),0.0) ]
+        else:
+            return [ ]
+
+print("CORRECT RESULT: no plan, lower bound at most 1.0")
+print("RUNTIME ESTIMATE: < 1 millisecond")
+plan,cost,lowerbound = weightedASTAR(ChainTestState(),
+                                     lambda state: (state.state == 0), # goal test
+                                     lambda state: 0.0, # function: distance to goal
+                                     1.0,5.0, # weight and cost bound
+                                     time.perf_counter() - 1.0) # time already over
+print(str(len(plan)) + " states, lower bound " + str(lowerbound))
+
+# A test for the reports of anytime A*. With the weight 3 the goal 0 is
+# reached from 1 first, at the optimal cost 2.0, but the state 7 with
+# g + h = 1.5 is still in OPEN, so the bound is 4/3. The run with the
+# weight 1 finds no cheaper plan, and then the bound 1.0 is reported too.
+
+class DeadEndTestState(TermTestState):
+
+    def successors(self):
+        if self.state == 1:
+            return [ ("1to0",DeadEndTestState(0),2.0), ("1to7",DeadEndTestState(7),0.5) ]
+        else:
+            return [ ]
+
+print("CORRECT RESULT: cost 2.0 bound 1.333, then cost 2.0 bound 1.0")
+print("RUNTIME ESTIMATE: < 1 millisecond")
+plan,cost,bound = anytimeASTAR(DeadEndTestState(),
+                               lambda state: (state.state == 0), # goal test
+                               lambda state: (1.0 if state.state != 0 else 0.0), # function: distance to goal
+                               w=3.0,delta=2.0,
+                               report=lambda plan,cost,bound: print("cost " + str(cost) + " bound " + "%.3f" % bound))
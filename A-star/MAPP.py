@@ -10,24 +10,132 @@
 #               and ci is the associated cost.
 #               Here the name ai of an action is a string.
 
-import time
-import queue
-import itertools
-
 # This is Multi-Agent Path planning (MAPP) in rectangular grids
 
+# The grid shared by all states of one problem instance.
+# The cell (x,y) is numbered x + xsize*y, and blocked[c] is 1 iff the cell
+# number c is a wall. The grid is never modified after it has been created,
+# and all successors of a state refer to the same grid object.
+
+class MAPPGrid:
+
+    def __init__(self,xsize,ysize,walls):
+        self.xsize = xsize
+        self.ysize = ysize
+        self.ncells = xsize * ysize
+        self.walls = frozenset(walls)
+        blocked = bytearray(self.ncells)
+        for x,y in self.walls:
+            if 0 <= x < xsize and 0 <= y < ysize:
+                blocked[x + xsize * y] = 1
+        self.blocked = bytes(blocked)
+        # moves[c] lists the moves (c2,name,cost) of one agent in cell c
+        self.moves = [ self.cellMoves(c) for c in range(0,self.ncells) ]
+
+    # A grid is pickled as its dimensions and walls only, and unpickled
+    # through getMAPPGrid, so that the states sent between processes share
+    # one grid in each process.
+
+    def __reduce__(self):
+        return (getMAPPGrid, (self.xsize,self.ysize,self.walls))
+
+    def cellMoves(self,c):
+        x,y = self.coordinates(c)
+        candidates = [(x,y,"-",0.0),(x+1,y,"E",1.0),(x-1,y,"W",1.0),(x,y+1,"N",1.0),(x,y-1,"S",1.0)]
+        return [ (self.cell(x2,y2),a,cost) for (x2,y2,a,cost) in candidates if not self.hasWallAt(x2,y2) ]
+
+    def cell(self,x,y):
+        return x + self.xsize * y
+
+    def coordinates(self,c):
+        return (c % self.xsize, c // self.xsize)
+
+    # Test if cell (x,y) can be entered: is it a wall, or outside the grid?
+
+    def hasWallAt(self,x,y):
+        return x < 0 or y < 0 or x >= self.xsize or y >= self.ysize or self.blocked[x + self.xsize * y] == 1
+
+    # Pack a sequence of cell numbers into one integer in base ncells.
+    # The leading 1 marks where the digits end, so that a state with the
+    # first agents in cell 0 is not confused with a state with fewer agents.
+
+    def pack(self,cells):
+        key = 1
+        for c in cells:
+            key = key * self.ncells + c
+        return key
+
+    def unpack(self,key):
+        cells = []
+        while key != 1:
+            key, c = divmod(key,self.ncells)
+            cells.append(c)
+        cells.reverse()
+        return cells
+
+# Grids are shared also between states that are created separately
+# with the same dimensions and walls.
+
+grids = dict()
+
+def getMAPPGrid(xsize,ysize,walls):
+    k = (xsize,ysize,frozenset(walls))
+    if k not in grids:
+        grids[k] = MAPPGrid(xsize,ysize,walls)
+    return grids[k]
+
 class MAPPGridState:
 
+    # A state consists of a reference to the shared grid and of the
+    # locations of all agents packed into one integer (see MAPPGrid.pack),
+    # so that hashing and equality are integer operations.
+
+    __slots__ = ("grid","key")
+
     # Creating a state:
     # initialLocations is a list of coordinate pairs (x,y) for all agents,
     # (xsize,ysize) is the size of the grid with cells [0..xsize-1]X[0..ysize-1],
     # walls is a list of cells (x,y) that cannot be entered.
+    # Alternatively, an existing MAPPGrid can be given as grid.
     
-    def __init__(self,initialLocations,xsize=10,ysize=10,walls = []):
-        self.agents = initialLocations
-        self.xsize = xsize
-        self.ysize = ysize
-        self.walls = walls
+    def __init__(self,initialLocations,xsize=10,ysize=10,walls = [],grid=None):
+        if grid is None:
+            grid = getMAPPGrid(xsize,ysize,walls)
+        self.grid = grid
+        self.key = grid.pack([ grid.cell(x,y) for (x,y) in initialLocations ])
+
+    # Create a state directly from a packed key
+
+    @staticmethod
+    def fromKey(grid,key):
+        state = MAPPGridState.__new__(MAPPGridState)
+        state.grid = grid
+        state.key = key
+        return state
+
+    # The locations of the agents as a list of coordinate pairs (x,y)
+
+    @property
+    def agents(self):
+        return [ self.grid.coordinates(c) for c in self.grid.unpack(self.key) ]
+
+    # The locations of the agents as a list of cell numbers
+
+    @property
+    def cells(self):
+        return self.grid.unpack(self.key)
+
+    @property
+    def xsize(self):
+        return self.grid.xsize
+
+    @property
+    def ysize(self):
+        return self.grid.ysize
+
+    @property
+    def walls(self):
+        return self.grid.walls
 
     # Construct a string representing a state.
 
@@ -40,15 +148,12 @@ class MAPPGridState:
     # The hash function for states, mapping each state to an integer
 
     def __hash__(self):
-        h = 0
-        for x,y in self.agents:
-            h = h * (self.xsize * self.ysize) + x + self.xsize * y
-        return h
+        return hash(self.key)
 
     # Equality of states.
 
     def __eq__(self,other):
-        return (self.agents == other.agents)
+        return (self.key == other.key)
 
     # queue.PriorityQueue needs an ordering of states
     
@@ -58,19 +163,17 @@ class MAPPGridState:
     # Test if cell (x,y) can be entered: is it a wall, or outside the grid?
 
     def hasWallAt(self,x,y):
-        if x < 0 or y < 0 or x >= self.xsize or y >= self.ysize or (x,y) in self.walls:
-            return True
-        else:
-            return False
+        return self.grid.hasWallAt(x,y)
 
     # Show state of the grid in a tabular form
 
     def show(self):
+        agents = self.agents
         for y in reversed(range(0,self.ysize)):
             for x in range(0,self.xsize):
                 flag = 0
-                for i in range(0,len(self.agents)):
-                    if x == self.agents[i][0] and y == self.agents[i][1]:
+                for i in range(0,len(agents)):
+                    if x == agents[i][0] and y == agents[i][1]:
                         print(str(i), end='')
                         flag = 1
                 if self.hasWallAt(x,y):
@@ -107,39 +210,74 @@ class MAPPGridState:
         return [ (x,y,a,c) for (x,y,a,c) in candidates if not self.hasWallAt(x,y)]
 
     # Compute all moves for all agents
+    #
+    # The agents are assigned their moves one at a time, in the order of
+    # the agents. A move is rejected as soon as it conflicts with the moves
+    # already assigned to earlier agents: the target cell is already taken
+    # (double occupancy), or the agent would swap places with an earlier
+    # agent. So no partial combination is extended past its first conflict.
+    # The successors are produced lazily, in the same order as the Cartesian
+    # product of the moves of the individual agents.
 
     def successors(self):
-        # Does the successor correspond to a legal move?
-        def samecoord(c1,c2):
-            if c1[0] == c2[0] and c1[1] == c2[1]:
-                return True
-            return False
-        def goodSuccessor(oo,aa):
-            for i in range(0,len(aa)):
-                for j in range(0,len(oo)):
-                    if i != j and samecoord(aa[i],aa[j]):
-                        return False # Double occupancy
-                    if i != j and samecoord(aa[i],oo[j]) and samecoord(aa[j],oo[i]):
-                        return False # Agents swapped positions
-            return True
-        # Pick s from a triples (x,y,s) and concatenate to an action name
-        def mkName(a):
-            return ",".join([ s for (x,y,s,c) in a])
-        # Pick (x,y) from a list of (x,y,s)
-        def mkCoordinates(a):
-            return [ (x,y) for (x,y,s,c) in a]
-        # Sum of the costs of the moves by each agent
-        def mkCost(a):
-            return sum([ c for (x,y,s,c) in a])
-
-        # For each agent, all possible new coordinates (list of lists of tuples)
-        cc = [ self.succCoords(x,y) for (x,y) in self.agents ]
-
-        # Form the Cartesian product, i.e. combinations of new coordinates
-        ss = [ (mkName(a),mkCoordinates(list(a)),mkCost(a)) for a in itertools.product(*cc) if goodSuccessor(self.agents,list(a)) ]
-        # Create a new state for each coordinate combination
-        return [ (actionname,MAPPGridState(new,xsize=self.xsize,ysize=self.ysize,walls=self.walls),cost) for (actionname,new,cost) in ss ]
-
+        grid = self.grid
+        moves = grid.moves
+        ncells = grid.ncells
+        old = grid.unpack(self.key)
+        k = len(old)
+        agentAt = { c : i for i,c in enumerate(old) } # old cell -> agent
+        new = [0] * k
+        names = [""] * k
+        taken = set() # cells taken by the agents assigned so far
+
+        def assign(i,key,cost):
+            if i == k:
+                yield (",".join(names),MAPPGridState.fromKey(grid,key),cost)
+                return
+            o = old[i]
+            for c,a,ca in moves[o]:
+                if c in taken:
+                    continue # Double occupancy
+                j = agentAt.get(c)
+                if j is not None and j < i and new[j] == o:
+                    continue # Agents swapped positions
+                new[i] = c
+                names[i] = a
+                taken.add(c)
+                yield from assign(i+1,key * ncells + c,cost + ca)
+                taken.discard(c)
+
+        return assign(0,1,0.0)
+
+
+# Distances from every cell of the grid to the cell 'goal', computed by a
+# breadth-first search from the goal. Moves are reversible, so this is also
+# the length of a shortest path from each cell to the goal. Unreachable
+# cells and walls get the distance float("inf").
+# The tables are cached for each grid and goal, so they are computed only
+# once however many heuristics and searches use them. They must not be
+# modified by the caller.
+
+distanceTables = dict()
+
+def goalDistances(grid,goal):
+    if (grid,goal) in distanceTables:
+        return distanceTables[(grid,goal)]
+    dist = [ float("inf") ] * grid.ncells
+    dist[goal] = 0
+    frontier = [ goal ]
+    d = 0
+    while frontier:
+        d += 1
+        nextfrontier = []
+        for c in frontier:
+            for c2,a,cost in grid.moves[c]:
+                if dist[c2] == float("inf"):
+                    dist[c2] = d
+                    nextfrontier.append(c2)
+        frontier = nextfrontier
+    distanceTables[(grid,goal)] = dist
+    return dist
 
 # Create an h-function for a goal state in MAPPGridState
 # The h-estimate is the maximum of the Manhattan distances
@@ -175,10 +313,35 @@ def MAPPdistance(goalPositions):
 
 # To enable A* search with more agents and in larger grid, the heuristic
 # should better take into account walls and/or the interactions between
-# the agents. If the grid is not too large, one could solve the optimal
+# the agents. If the grid is not too large, one can solve the optimal
 # single agent path planning problem separately for every agent and all
 # possible cells, and use this as a part of the heuristic instead of
-# the Manhattan distance.
+# the Manhattan distance. This is what the following two functions do,
+# with the distances from goalDistances. The tables are computed when
+# the h-function is first called, for the grid of the state, so the
+# h-functions are created from the goal positions only, like above.
+
+# The sum of the true distances to the goal positions
+
+def MAPPtruedistance(goalPositions):
+    tables = dict() # grid -> distance tables of the agents
+    def distance(state):
+        grid = state.grid
+        if grid not in tables:
+            tables[grid] = [ goalDistances(grid,grid.cell(x,y)) for (x,y) in goalPositions ]
+        return sum([ d[c] for d,c in zip(tables[grid],grid.unpack(state.key)) ])
+    return distance
+
+# The maximum of the true distances to the goal positions
+
+def MAPPtruedistance0(goalPositions):
+    tables = dict() # grid -> distance tables of the agents
+    def distance(state):
+        grid = state.grid
+        if grid not in tables:
+            tables[grid] = [ goalDistances(grid,grid.cell(x,y)) for (x,y) in goalPositions ]
+        return max([ d[c] for d,c in zip(tables[grid],grid.unpack(state.key)) ])
+    return distance
 
 # Create a Grid map including walls and initial locations from
 # a text representation of the grid.
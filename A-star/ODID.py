@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+
+# Multi-Agent Path planning with Operator Decomposition (OD) and
+# Independence Detection (ID).
+#
+# Operator decomposition: instead of moving all agents of a group at once,
+# which gives up to 5^k successors for k agents, the agents move one at a
+# time. A state where only the first i agents have moved is an intermediate
+# state, and a complete time step consists of k such moves. The branching
+# factor is at most 5, and A* with an admissible heuristic only expands the
+# intermediate states whose f-value is below the optimal cost.
+#
+# Independence detection: every agent is first planned alone. If the plans
+# of two groups of agents conflict, the groups are merged and planned
+# jointly. This is repeated until the plans of all groups are free of
+# conflicts. Only the agents that really interact are searched in the joint
+# space, and the sum of the costs of the group plans is optimal.
+#
+# The legal moves are those of MAPPGridState.successors: an agent may not
+# enter a cell entered by another agent in the same step, and two agents
+# may not swap their positions. Moves cost 1.0, waiting costs 0.0.
+
+from MAPP import MAPPGridState, getMAPPGrid, goalDistances
+from Astar import ASTAR
+
+class ODState:
+
+    # positions are the current cells of the agents of the group, index is
+    # the agent to move next, and moved holds the cells the agents
+    # 0..index-1 occupied before they moved in the current time step.
+
+    __slots__ = ("grid","positions","moved","index")
+
+    def __init__(self,grid,positions,moved=(),index=0):
+        self.grid = grid
+        self.positions = positions
+        self.moved = moved
+        self.index = index
+
+    def __repr__(self):
+        return str([ self.grid.coordinates(c) for c in self.positions ]) + "/" + str(self.index)
+
+    def __hash__(self):
+        return hash((self.positions,self.moved,self.index))
+
+    def __eq__(self,other):
+        return (self.positions == other.positions and self.moved == other.moved and self.index == other.index)
+
+    def __lt__(self,other):
+        return False
+
+    # Successors are the moves of the agent 'index' only
+
+    def successors(self):
+        i = self.index
+        positions = self.positions
+        moved = self.moved
+        o = positions[i]
+        last = (i + 1 == len(positions))
+        result = []
+        for c,a,cost in self.grid.moves[o]:
+            if c in positions[0:i]:
+                continue # Double occupancy
+            if c in moved and positions[moved.index(c)] == o:
+                continue # Agents swapped positions
+            newpositions = positions[0:i] + (c,) + positions[i+1:]
+            if last:
+                result.append((a,ODState(self.grid,newpositions),cost))
+            else:
+                result.append((a,ODState(self.grid,newpositions,moved + (o,),i+1),cost))
+        return result
+
+# Optimal plan for one group of agents, as a list of the cells of the
+# agents of the group at each time step, and its cost.
+
+def ODSEARCH(grid,starts,goals,distances):
+    goalpositions = tuple(goals)
+    def goaltest(state):
+        return state.index == 0 and state.positions == goalpositions
+    def h(state):
+        return sum(d[c] for d,c in zip(distances,state.positions))
+    plan,cost = ASTAR(ODState(grid,tuple(starts)),goaltest,h,verbose=False)
+    return ([ s.positions for s in plan if s.index == 0 ], cost)
+
+# Cells of all agents of a group at time t. After the end of its plan
+# the group stays at its goal.
+
+def positionsAt(path,t):
+    if t < len(path):
+        return path[t]
+    return path[-1]
+
+# Find the first conflict between the plans of two different groups,
+# and return the pair of groups, or None if there are no conflicts.
+
+def firstConflict(groups,paths):
+    T = max(len(p) for p in paths)
+    for t in range(0,T):
+        owner = dict() # cell -> group at time t
+        for g in range(0,len(groups)):
+            for c in positionsAt(paths[g],t):
+                if c in owner and owner[c] != g:
+                    return (owner[c],g) # Double occupancy
+                owner[c] = g
+        if t == 0:
+            continue
+        entered = dict() # (from,to) -> group for moves from t-1 to t
+        for g in range(0,len(groups)):
+            for c0,c1 in zip(positionsAt(paths[g],t-1),positionsAt(paths[g],t)):
+                if c0 != c1:
+                    if (c1,c0) in entered and entered[(c1,c0)] != g:
+                        return (entered[(c1,c0)],g) # Agents swapped positions
+                    entered[(c0,c1)] = g
+    return None
+
+# Solve a MAPP problem given as the output of createMAPPgrid for the
+# initial and goal locations. Returns (plan,cost) like ASTAR, where plan
+# is a list of MAPPGridStates and cost is the optimal sum of the costs.
+
+def ODID(initlocations,goallocations,xsize,ysize,walls):
+    grid = getMAPPGrid(xsize,ysize,walls)
+    starts = [ grid.cell(x,y) for (x,y) in initlocations ]
+    goals = [ grid.cell(x,y) for (x,y) in goallocations ]
+    distances = [ goalDistances(grid,g) for g in goals ]
+
+    def plan(group):
+        return ODSEARCH(grid,[ starts[a] for a in group ],[ goals[a] for a in group ],[ distances[a] for a in group ])
+
+    groups = [ [a] for a in range(0,len(starts)) ]
+    results = [ plan(group) for group in groups ]
+    while True:
+        if any(cost == float("inf") for path,cost in results):
+            return ([], float("inf"))
+        conflict = firstConflict(groups,[ path for path,cost in results ])
+        if conflict is None:
+            break
+        g1,g2 = conflict
+        merged = sorted(groups[g1] + groups[g2])
+        for g in sorted(conflict,reverse=True):
+            del groups[g]
+            del results[g]
+        groups.append(merged)
+        results.append(plan(merged))
+
+    # Combine the plans of the groups into one plan for all agents
+
+    T = max(len(path) for path,cost in results)
+    plan = []
+    for t in range(0,T):
+        cells = [ 0 ] * len(starts)
+        for group,(path,cost) in zip(groups,results):
+            for a,c in zip(group,positionsAt(path,t)):
+                cells[a] = c
+        plan.append(MAPPGridState([ grid.coordinates(c) for c in cells ],grid=grid))
+    return (plan, sum(cost for path,cost in results))
@@ -5,9 +5,15 @@ import time
 import queue
 import itertools
 
-from MAPP import MAPPGridState, MAPPdistance, MAPPdistance0, createMAPPgrid
+from MAPP import MAPPGridState, MAPPdistance, MAPPdistance0, MAPPtruedistance, MAPPtruedistance0, createMAPPgrid
 from BFS import breadthFirstSearch
-from Astar import ASTAR
+from Astar import ASTAR, IDASTAR, anytimeASTAR, BEAMSEARCH, SMASTAR
+from ODID import ODID
+from CBS import CBS
+from gridpath import JPS, getGridMap
+from searchstats import SearchStats
+from heuristiccache import HeuristicCache
+from distanceoracle import MAPPoracledistance, getDistanceOracle
 
 # ........ ........
 # ........ ........
@@ -28,6 +34,19 @@ plan,cost = ASTAR(MAPPGridState([(0,0),(1,1),(0,1),(1,0)],xsize=5,ysize=5,walls=
 for s in plan:
     s.show()
 
+# The first three agents of the same instance with the true distances,
+# which are both admissible. Their sum is far more informative than their
+# maximum. With all four agents the maximum needs over 70000 expansions.
+
+print("CORRECT RESULT: optimal cost is 12.0 with both, 11 and 2436 expansions")
+print("RUNTIME ESTIMATE: < 5 seconds")
+for h in [MAPPtruedistance([(3,3),(2,2),(2,3)]),MAPPtruedistance0([(3,3),(2,2),(2,3)])]:
+    plan,cost,stats = ASTAR(MAPPGridState([(0,0),(1,1),(0,1)],xsize=5,ysize=5,walls=[]),
+                            lambda state: (state.agents == [(3,3),(2,2),(2,3)]), # goal test
+                            h, # function: distance to goal
+                            stats=SearchStats())
+    print(stats)
+
 
 grid0I= ["...........",
          "...........",
@@ -75,7 +94,7 @@ grid1G= ["...#.........",
          "........#....",
          "........#...."]
 
-print("CORRECT RESULT: optimal cost is 36.0")
+print("CORRECT RESULT: optimal cost is 34.0")
 print("RUNTIME ESTIMATE: < 15 seconds")
 init1,xs1,ys1,w1 = createMAPPgrid(grid1I)
 goal1,xs1,ys1,w1 = createMAPPgrid(grid1G)
@@ -115,3 +134,172 @@ for s in plan:
     s.show()
 
 
+
+# The same instance with the sum of the true distances as the heuristic,
+# which takes the walls into account
+
+print("CORRECT RESULT: optimal cost is 24.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = ASTAR(MAPPGridState(init2,xsize=xs2,ysize=ys2,walls=w2),
+                  lambda state: (state.agents == goal2), # goal test
+                  MAPPtruedistance(goal2)) # function: distance to goal
+for s in plan:
+    s.show()
+
+# The same instance with IDA*. The joint moves reach the same states
+# through very many paths, so the transposition table is essential here.
+
+print("CORRECT RESULT: optimal cost is 24.0")
+print("RUNTIME ESTIMATE: < 10 seconds")
+plan,cost = IDASTAR(MAPPGridState(init2,xsize=xs2,ysize=ys2,walls=w2),
+                    lambda state: (state.agents == goal2), # goal test
+                    MAPPtruedistance(goal2), # function: distance to goal
+                    ttsize=1000000) # transposition table size
+for s in plan:
+    s.show()
+
+# Anytime weighted A* on grid1: the first plans are found very quickly,
+# and they improve, with the suboptimality bound, until the optimal plan.
+
+print("CORRECT RESULT: costs 50.0 46.0 44.0 40.0 34.0, the last with bound 1.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost,bound = anytimeASTAR(MAPPGridState(init1,xsize=xs1,ysize=ys1,walls=w1),
+                               lambda state: (state.agents == goal1), # goal test
+                               MAPPdistance(goal1), # function: distance to goal
+                               w=3.0,timelimit=60.0,
+                               report=lambda plan,cost,bound: print("cost " + str(cost) + " bound " + str(bound)))
+
+# Beam search and SMA* on grid1, with bounded memory. The beam search
+# plan is not optimal, but found quickly. SMA* finds an optimal plan
+# if it fits in memory.
+
+print("CORRECT RESULT: cost is 40.0")
+print("RUNTIME ESTIMATE: < 3 seconds")
+plan,cost = BEAMSEARCH(MAPPGridState(init1,xsize=xs1,ysize=ys1,walls=w1),
+                       lambda state: (state.agents == goal1), # goal test
+                       MAPPtruedistance(goal1), # function: distance to goal
+                       100) # beam width
+
+print("CORRECT RESULT: optimal cost is 34.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = SMASTAR(MAPPGridState(init1,xsize=xs1,ysize=ys1,walls=w1),
+                    lambda state: (state.agents == goal1), # goal test
+                    MAPPtruedistance(goal1), # function: distance to goal
+                    5000) # maximum number of nodes
+for s in plan:
+    s.show()
+
+# The same instances with Operator Decomposition and Independence Detection
+
+print("CORRECT RESULT: optimal cost is 36.0")
+print("RUNTIME ESTIMATE: < 1 second")
+plan,cost = ODID(init0,goal0,xs0,ys0,w0)
+print(cost)
+for s in plan:
+    s.show()
+
+print("CORRECT RESULT: optimal cost is 34.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = ODID(init1,goal1,xs1,ys1,w1)
+print(cost)
+for s in plan:
+    s.show()
+
+print("CORRECT RESULT: optimal cost is 24.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = ODID(init2,goal2,xs2,ys2,w2)
+print(cost)
+for s in plan:
+    s.show()
+
+# Eight agents, which is out of reach for the joint A* search above
+
+grid3I= ["1...2...3...4.",
+         "..............",
+         "...##....##...",
+         "..............",
+         "5...6...7...8."]
+
+grid3G= ["5...6...7...8.",
+         "..............",
+         "...##....##...",
+         "..............",
+         "1...2...3...4."]
+
+print("CORRECT RESULT: optimal cost is 42.0")
+print("RUNTIME ESTIMATE: < 1 second")
+init3,xs3,ys3,w3 = createMAPPgrid(grid3I)
+goal3,xs3,ys3,w3 = createMAPPgrid(grid3G)
+plan,cost = ODID(init3,goal3,xs3,ys3,w3)
+print(cost)
+for s in plan:
+    s.show()
+
+# The same instances with Conflict-Based Search
+
+print("CORRECT RESULT: optimal cost is 34.0")
+print("RUNTIME ESTIMATE: < 10 seconds")
+plan,cost = CBS(init1,goal1,xs1,ys1,w1)
+print(cost)
+
+print("CORRECT RESULT: optimal cost is 24.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = CBS(init2,goal2,xs2,ys2,w2)
+print(cost)
+
+print("CORRECT RESULT: optimal cost is 42.0")
+print("RUNTIME ESTIMATE: < 1 second")
+plan,cost = CBS(init3,goal3,xs3,ys3,w3)
+print(cost)
+
+# Ten agents crossing a 20 X 20 grid through gaps in two walls,
+# with the order of the agents reversed.
+
+print("CORRECT RESULT: optimal cost is 290.0")
+print("RUNTIME ESTIMATE: < 30 seconds")
+init4 = [ (0,2*i) for i in range(0,10) ]
+goal4 = [ (19,2*(9-i)) for i in range(0,10) ]
+w4 = [ (x,y) for x in [6,13] for y in range(0,20) if y % 4 != 1 ]
+plan,cost = CBS(init4,goal4,20,20,w4)
+print(cost)
+
+# One agent on a 100 X 100 grid with twelve walls, each with one gap,
+# with Jump Point Search, and the same grid for many pairs of cells.
+
+print("CORRECT RESULT: optimal cost is 286.0")
+print("RUNTIME ESTIMATE: < 1 second")
+w5 = [ (x,y) for x in range(4,100,8) for y in range(0,100) if y != (x*37) % 100 ]
+plan,cost = JPS([(0,0)],[(99,99)],100,100,w5)
+print(cost)
+
+print("CORRECT RESULT: costs 286 99 102 inf")
+print("RUNTIME ESTIMATE: < 1 second")
+results = getGridMap(100,100,w5).queries([((0,0),(99,99)),((0,0),(0,99)),((0,0),(3,99)),((0,0),(4,0))])
+print(*[ cost for path,cost in results ])
+
+# The same heuristic as MAPPtruedistance from the all-pairs distance matrix,
+# and distances from it directly. The matrix is for grids of up to some
+# thousands of cells, so for the 100 X 100 grid above GridMap is used.
+
+print("CORRECT RESULT: optimal cost is 34.0")
+print("RUNTIME ESTIMATE: < 5 seconds")
+plan,cost = ASTAR(MAPPGridState(init1,xsize=xs1,ysize=ys1,walls=w1),
+                  lambda state: (state.agents == goal1), # goal test
+                  MAPPoracledistance(goal1)) # function: distance to goal
+
+print("CORRECT RESULT: distances 8 26 20 inf")
+print("RUNTIME ESTIMATE: < 1 second")
+oracle = getDistanceOracle(xs1,ys1,w1)
+print(*[ oracle.distance(c1,c2) for c1,c2 in [((2,4),(10,4)),((0,8),(4,8)),((0,0),(12,0)),((0,8),(3,8))] ])
+
+# A* calls h for every state pushed to OPEN, and about half of the calls
+# on grid1 are for states already seen through another path. With the
+# cache, h is computed only once for each of them.
+
+print("CORRECT RESULT: optimal cost is 34.0, with 14829 hits and 13660 misses")
+print("RUNTIME ESTIMATE: < 5 seconds")
+h = HeuristicCache(MAPPtruedistance(goal1),capacity=100000)
+plan,cost = ASTAR(MAPPGridState(init1,xsize=xs1,ysize=ys1,walls=w1),
+                  lambda state: (state.agents == goal1), # goal test
+                  h) # function: distance to goal, cached
+print(h)
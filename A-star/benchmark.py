@@ -0,0 +1,306 @@
+#!/usr/bin/python3
+
+# Benchmarks for the search algorithms.
+#
+# Each benchmark is a function that solves one problem instance with one
+# search algorithm and returns the pair (cost,expansions). expansions is
+# None for algorithms that do not count them. The instances are those of
+# Tests.py and of the knight problems in ../Knight state/knights.py.
+#
+# Each benchmark is run 'repeat' times, each time in a new process, and
+# the following are recorded:
+#   time        the smallest wall-clock time of the runs, in seconds
+#   expansions  the number of expanded states
+#   rss         the peak resident set size of the process, in KB,
+#               including the interpreter and the modules loaded
+#   cost        the cost of the solution found
+# The output of the algorithms is not shown.
+#
+#   python3 benchmark.py                      run all benchmarks that are not slow
+#   python3 benchmark.py --slow               run also the slow ones
+#   python3 benchmark.py grid1 knights        run the benchmarks, slow or not, whose names
+#                                             contain grid1 or knights
+#   python3 benchmark.py --repeat 5           run each benchmark 5 times
+#   python3 benchmark.py --save base.json     save the results as a baseline
+#   python3 benchmark.py --baseline base.json compare the results with a baseline
+#
+# When compared with a baseline, a benchmark is flagged if its time or rss
+# has grown by more than the tolerance (default 20%), if it expands more
+# states, or if the cost of its solution has changed. Times also get an
+# absolute slack (default 0.05 s), so that the very short benchmarks are
+# not flagged because of noise. The exit status is
+# then 1, so the comparison can be used in scripts.
+
+import os
+import io
+import sys
+import json
+import time
+import resource
+import argparse
+import contextlib
+import multiprocessing
+
+from MAPP import MAPPGridState, MAPPdistance, MAPPtruedistance, createMAPPgrid
+from BFS import breadthFirstSearch
+from Astar import ASTAR, IDASTAR
+from ODID import ODID
+from CBS import CBS
+from searchstats import SearchStats
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","Knight state"))
+
+import knights
+
+benchmarks = dict() # name -> (function,slow)
+
+def register(name,slow=False):
+    def add(f):
+        benchmarks[name] = (f,slow)
+        return f
+    return add
+
+# The MAPP instances
+
+grid0I= ["...........",
+         "...........",
+         "..12.......",
+         "..34.......",
+         "...........",
+         "...........",
+         "..........."]
+
+grid0G= ["...........",
+         "...........",
+         "...........",
+         "...........",
+         "...........",
+         "........12.",
+         "........34"]
+
+grid1I= ["...#.........",
+         "...#.........",
+         "...#.........",
+         "...########..",
+         "..12......34.",
+         "...###..###..",
+         "...######....",
+         "........#....",
+         "........#...."]
+
+grid1G= ["...#.........",
+         "...#.........",
+         "...#.........",
+         "...########..",
+         "...34.....21.",
+         "...###..###..",
+         "...######....",
+         "........#....",
+         "........#...."]
+
+grid2I= ["..1#....",
+         "..2#....",
+         "........",
+         "...#3...",
+         "...#4...",
+         "...#...."]
+
+grid2G= ["...#1...",
+         "...#2...",
+         "........",
+         "..3#....",
+         "..4#....",
+         "...#...."]
+
+grid3I= ["1...2...3...4.",
+         "..............",
+         "...##....##...",
+         "..............",
+         "5...6...7...8."]
+
+grid3G= ["5...6...7...8.",
+         "..............",
+         "...##....##...",
+         "..............",
+         "1...2...3...4."]
+
+mappGrids = { "grid0" : (grid0I,grid0G), "grid1" : (grid1I,grid1G),
+              "grid2" : (grid2I,grid2G), "grid3" : (grid3I,grid3G) }
+
+def mappInstance(name):
+    gridI,gridG = mappGrids[name]
+    init,xs,ys,w = createMAPPgrid(gridI)
+    goal,xs,ys,w = createMAPPgrid(gridG)
+    return (init,goal,xs,ys,w)
+
+def astarBenchmark(name,distance):
+    init,goal,xs,ys,w = mappInstance(name)
+    plan,cost,stats = ASTAR(MAPPGridState(init,xsize=xs,ysize=ys,walls=w),
+                            lambda state: (state.agents == goal),
+                            distance(goal),stats=SearchStats())
+    return (cost,stats.expansions)
+
+register("grid0/ASTAR")(lambda: astarBenchmark("grid0",MAPPdistance))
+register("grid0/ASTAR-true")(lambda: astarBenchmark("grid0",MAPPtruedistance))
+register("grid1/ASTAR",slow=True)(lambda: astarBenchmark("grid1",MAPPdistance))
+register("grid1/ASTAR-true")(lambda: astarBenchmark("grid1",MAPPtruedistance))
+register("grid2/ASTAR",slow=True)(lambda: astarBenchmark("grid2",MAPPdistance))
+register("grid2/ASTAR-true")(lambda: astarBenchmark("grid2",MAPPtruedistance))
+
+@register("grid2/IDASTAR-tt")
+def idastarGrid2():
+    init,goal,xs,ys,w = mappInstance("grid2")
+    plan,cost,stats = IDASTAR(MAPPGridState(init,xsize=xs,ysize=ys,walls=w),
+                              lambda state: (state.agents == goal),
+                              MAPPtruedistance(goal),ttsize=1000000,stats=SearchStats())
+    return (cost,stats.expansions)
+
+@register("grid2/BFS",slow=True)
+def bfsGrid2():
+    init,goal,xs,ys,w = mappInstance("grid2")
+    path,stats = breadthFirstSearch(MAPPGridState(init,xsize=xs,ysize=ys,walls=w),
+                                    lambda state: (state.agents == goal),stats=SearchStats())
+    return (len(path),stats.expansions)
+
+def mappBenchmark(name,algorithm):
+    init,goal,xs,ys,w = mappInstance(name)
+    plan,cost = algorithm(init,goal,xs,ys,w)
+    return (cost,None)
+
+for name in ["grid0","grid1","grid2","grid3"]:
+    register(name + "/ODID")(lambda name=name: mappBenchmark(name,ODID))
+    register(name + "/CBS")(lambda name=name: mappBenchmark(name,CBS))
+
+# The knight problems
+
+def knightsBenchmark(search,initial,goal):
+    if search == "BFS":
+        path,stats = knights.breadthFirstSearch(knights.KnightState(initial),lambda state: (state.occupied == goal),
+                                                stats=SearchStats())
+    elif search == "bidirectional":
+        path,stats = knights.bidirectionalBFS(knights.KnightState(initial),knights.KnightState(goal),
+                                              stats=SearchStats())
+    else:
+        path,stats = knights.symmetricBFS(knights.KnightState(initial),[ knights.KnightState(goal) ],
+                                          stats=SearchStats())
+    return (len(path),stats.expansions)
+
+knightInstances = {
+    "knights-swap2" : ([(0,0,False),(0,1,True)],
+                       [(0,0,True),(0,1,False)]),
+    "knights-square4" : ([(0,0,True),(0,1,True),(1,0,True),(1,1,True)],
+                         [(2,2,True),(2,3,True),(3,2,True),(3,3,True)]),
+    "knights-formation5" : ([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True)],
+                            [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True)]),
+    "knights-formation6" : ([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)],
+                            [(2,1,True),(2,2,True),(2,3,True),(3,1,True),(3,2,True),(3,3,True)]),
+    "knights-diagonal6" : ([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)],
+                           [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True),(3,4,True)]),
+    "knights-diagonal6x3" : ([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)],
+                             [(3,3,True),(3,4,True),(3,5,True),(4,3,True),(4,4,True),(4,5,True)]) }
+
+slowKnights = { ("knights-diagonal6","BFS"), ("knights-diagonal6","symmetric"), ("knights-diagonal6x3","BFS"),
+                ("knights-diagonal6x3","bidirectional"), ("knights-diagonal6x3","symmetric") }
+
+for name,(initial,goal) in knightInstances.items():
+    for search in ["BFS","bidirectional","symmetric"]:
+        register(name + "/" + search,slow=(name,search) in slowKnights)(
+            lambda search=search,initial=initial,goal=goal: knightsBenchmark(search,initial,goal))
+
+# Run one benchmark in the current process, and send the results
+
+def runBenchmark(name,connection):
+    f,slow = benchmarks[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        cost,expansions = f()
+        elapsed = time.perf_counter() - t0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send({ "time" : elapsed, "expansions" : expansions, "rss" : rss, "cost" : cost })
+    connection.close()
+
+# Run a benchmark 'repeat' times, each in a new process, so that the peak
+# memory use of one does not affect the others
+
+def measure(name,repeat):
+    runs = []
+    for i in range(0,repeat):
+        receiver,sender = multiprocessing.Pipe(duplex=False)
+        p = multiprocessing.Process(target=runBenchmark,args=(name,sender))
+        p.start()
+        sender.close()
+        try:
+            runs.append(receiver.recv())
+        except EOFError:
+            raise RuntimeError("benchmark " + name + " failed")
+        p.join()
+    return { "time" : min(r["time"] for r in runs),
+             "expansions" : runs[0]["expansions"],
+             "rss" : max(r["rss"] for r in runs),
+             "cost" : runs[0]["cost"] }
+
+# The reasons why the result is worse than the baseline
+
+def regressions(result,base,tolerance,slack):
+    flags = []
+    if result["cost"] != base["cost"]:
+        flags.append("cost " + str(base["cost"]) + " -> " + str(result["cost"]))
+    if result["time"] > base["time"] * (1 + tolerance) + slack:
+        flags.append("time +" + "%.0f" % (100 * (result["time"] / base["time"] - 1)) + "%")
+    if result["rss"] > base["rss"] * (1 + tolerance):
+        flags.append("rss +" + "%.0f" % (100 * (result["rss"] / base["rss"] - 1)) + "%")
+    if result["expansions"] is not None and base["expansions"] is not None and result["expansions"] > base["expansions"]:
+        flags.append("expansions " + str(base["expansions"]) + " -> " + str(result["expansions"]))
+    return flags
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description="Run the search benchmarks.")
+    parser.add_argument("names",nargs="*",help="run only benchmarks whose names contain one of these")
+    parser.add_argument("--repeat",type=int,default=1,help="number of runs of each benchmark")
+    parser.add_argument("--slow",action="store_true",help="run also the slow benchmarks")
+    parser.add_argument("--save",help="save the results to this JSON file")
+    parser.add_argument("--baseline",help="compare the results with this JSON file")
+    parser.add_argument("--tolerance",type=float,default=0.2,help="allowed relative growth of time and rss")
+    parser.add_argument("--slack",type=float,default=0.05,help="allowed absolute growth of time in seconds")
+    parser.add_argument("--list",action="store_true",help="list the benchmarks")
+    args = parser.parse_args(arguments)
+
+    selected = [ name for name,(f,slow) in benchmarks.items()
+                 if (args.slow or not slow or args.names) and
+                    (not args.names or any(n in name for n in args.names)) ]
+    if args.list:
+        for name in benchmarks:
+            print(name + (" (slow)" if benchmarks[name][1] else ""))
+        return 0
+
+    baseline = dict()
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = dict()
+    regressed = False
+    print("%-32s %10s %12s %10s %8s" % ("benchmark","time (s)","expansions","rss (MB)","cost"))
+    for name in selected:
+        result = measure(name,args.repeat)
+        results[name] = result
+        line = "%-32s %10.3f %12s %10.1f %8s" % (name,result["time"],result["expansions"],result["rss"] / 1024,result["cost"])
+        if name in baseline:
+            flags = regressions(result,baseline[name],args.tolerance,args.slack)
+            if flags:
+                regressed = True
+                line += "  REGRESSION: " + ", ".join(flags)
+            else:
+                line += "  ok (" + "%.3f" % baseline[name]["time"] + " s)"
+        print(line)
+        sys.stdout.flush()
+
+    if args.save is not None:
+        with open(args.save,"w") as f:
+            json.dump(results,f,indent=2,sort_keys=True)
+    if regressed:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+
+# Shortest-path distances between all pairs of cells of a grid.
+#
+# The grid is given like createMAPPgrid returns it, as xsize, ysize and
+# the list of the walls, and the cells are numbered x + xsize*y like in
+# MAPPGrid. The distance from the cell c1 to the cell c2 for one agent
+# moving in 4 directions is matrix[c1,c2], and UNREACHABLE if there is no
+# path or one of the cells is a wall. The matrix has 2 bytes per pair of
+# cells, which is 32 MB for 4000 cells, so it is meant for grids of up to
+# some thousands of cells.
+#
+# The distances are computed by breadth-first search from all cells at
+# the same time. The frontier and the visited cells of all searches are
+# bit sets over the start cells, one bit per start cell, in an array that
+# has the shape of the grid, so one level of all searches is a few NumPy
+# operations on whole arrays.
+#
+# If a directory is given, the matrix is saved there in a file named after
+# the dimensions and the walls, and later oracles for the same grid, also
+# in later runs, map the file into memory instead of computing it again.
+# Oracles are also shared within one run through getDistanceOracle.
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.uint16).max
+
+class DistanceOracle:
+
+    def __init__(self,xsize,ysize,walls,directory=None):
+        self.xsize = xsize
+        self.ysize = ysize
+        self.ncells = xsize * ysize
+        free = np.ones((ysize,xsize),dtype=bool)
+        for x,y in walls:
+            if 0 <= x < xsize and 0 <= y < ysize:
+                free[y,x] = False
+        self.free = free
+        self.filename = None
+        if directory is not None:
+            self.filename = os.path.join(directory,self.fileName(xsize,ysize,walls))
+            if os.path.exists(self.filename):
+                self.matrix = np.load(self.filename,mmap_mode='r')
+                return
+        self.matrix = self.allPairs()
+        if self.filename is not None:
+            self.save(directory)
+
+    # The file name is unique for the dimensions and the set of walls
+
+    @staticmethod
+    def fileName(xsize,ysize,walls):
+        inside = sorted({ (x,y) for x,y in walls if 0 <= x < xsize and 0 <= y < ysize })
+        digest = hashlib.sha1(repr((xsize,ysize,inside)).encode()).hexdigest()[0:16]
+        return "distances-" + str(xsize) + "x" + str(ysize) + "-" + digest + ".npy"
+
+    # Write the matrix into a temporary file first and then rename it, so
+    # that an interrupted run or a concurrent one never leaves a partial file.
+
+    def save(self,directory):
+        fd,tmpname = tempfile.mkstemp(dir=directory,suffix=".tmp")
+        try:
+            with os.fdopen(fd,"wb") as f:
+                np.save(f,self.matrix)
+            os.replace(tmpname,self.filename)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+
+    # Breadth-first search from every free cell. Bit j of the word w of
+    # frontier[y,x] is set iff the cell (x,y) is at the current distance
+    # from the start cell 64*w+j, and the same for visited.
+
+    def allPairs(self):
+        xsize,ysize,n = self.xsize,self.ysize,self.ncells
+        free = self.free
+        words = (n + 63) // 64
+        matrix = np.full((n,n),UNREACHABLE,dtype=np.uint16)
+        starts = np.flatnonzero(free.reshape(n))
+        matrix[starts,starts] = 0
+
+        frontier = np.zeros((ysize,xsize,words),dtype=np.uint64)
+        frontier.reshape(n,words)[starts,starts // 64] = np.left_shift(np.uint64(1),(starts % 64).astype(np.uint64))
+        visited = frontier.copy()
+        mask = np.where(free,~np.uint64(0),np.uint64(0))[:,:,None]
+        ids = np.arange(0,words) # the start cells of the word i are those of the word ids[i]
+        d = 0
+        while True:
+            d += 1
+
+            # The searches from most start cells end long before the last
+            # one, so the words where all searches have ended are dropped.
+
+            if d % 16 == 0:
+                active = np.flatnonzero(frontier.reshape(n,-1).any(axis=0))
+                if len(active) < 0.75 * len(ids):
+                    frontier = frontier[:,:,active]
+                    visited = visited[:,:,active]
+                    ids = ids[active]
+                    words = len(ids)
+            reached = np.zeros_like(frontier)
+            reached[1:,:] |= frontier[:-1,:]
+            reached[:-1,:] |= frontier[1:,:]
+            reached[:,1:] |= frontier[:,:-1]
+            reached[:,:-1] |= frontier[:,1:]
+            reached &= mask
+            reached &= ~visited
+            found = np.flatnonzero(reached)
+            if len(found) == 0:
+                break
+            cells,ws = np.divmod(found,words)
+            visited |= reached
+            frontier = reached
+
+            # Record the distance d for the start cells of the bits set.
+            # The distances are symmetric, and writing the row of the cell
+            # reached is faster than writing the rows of the start cells.
+
+            values = reached.reshape(-1)[found].astype('<u8')
+            bits = np.unpackbits(values.view(np.uint8),bitorder='little').view(bool)
+            rows,js = np.divmod(np.flatnonzero(bits),64)
+            matrix[cells[rows],ids[ws[rows]] * 64 + js] = d
+        return matrix
+
+    def cell(self,x,y):
+        return x + self.xsize * y
+
+    def distance(self,c1,c2):
+        d = self.matrix[self.cell(*c1),self.cell(*c2)]
+        if d == UNREACHABLE:
+            return float("inf")
+        return int(d)
+
+    # The distances from all cells to the cell (x,y), as a list like
+    # goalDistances returns, with float("inf") for the unreachable cells.
+
+    def distancesTo(self,x,y):
+        column = self.matrix[:,self.cell(x,y)]
+        return [ float("inf") if d == UNREACHABLE else int(d) for d in column.tolist() ]
+
+oracles = dict()
+
+def getDistanceOracle(xsize,ysize,walls,directory=None):
+    k = (xsize,ysize,frozenset(walls))
+    if k not in oracles:
+        oracles[k] = DistanceOracle(xsize,ysize,walls,directory)
+    return oracles[k]
+
+# Create an h-function for a goal state in MAPPGridState, like
+# MAPPtruedistance: the sum of the true distances to the goal positions.
+# The rows of the matrix for the goal cells are taken once for each grid,
+# and then h is one lookup of the cells of all agents.
+
+def MAPPoracledistance(goalPositions,directory=None):
+    tables = dict() # grid -> (rows of the goal cells, agent indices)
+    def distance(state):
+        grid = state.grid
+        if grid not in tables:
+            oracle = getDistanceOracle(grid.xsize,grid.ysize,grid.walls,directory)
+            goals = [ grid.cell(x,y) for (x,y) in goalPositions ]
+            rows = np.where(oracle.matrix[goals] == UNREACHABLE,np.inf,oracle.matrix[goals])
+            tables[grid] = (rows,np.arange(0,len(goals)))
+        rows,agents = tables[grid]
+        return float(rows[agents,grid.unpack(state.key)].sum())
+    return distance
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+
+# Shortest paths of a single agent on a MAPP grid, with Jump Point Search.
+#
+# On a grid with 4-connected unit-cost moves there are usually very many
+# shortest paths between two cells, which differ only in the order of the
+# horizontal and vertical moves, and A* expands the cells of all of them.
+# Jump Point Search considers only one canonical ordering of the moves: a
+# path goes horizontally as far as it wants, and turns from vertical to
+# horizontal only right after passing the corner of a wall, where the
+# horizontal move could not have been made earlier. Then
+#   - moving vertically, the path continues to the same direction until
+#     a cell where a horizontal turn is forced,
+#   - moving horizontally, the path may turn up or down at any cell, so
+#     it continues until a cell from which one of the vertical directions
+#     leads to such a forced turn, or to the goal.
+# These cells are the jump points, and A* is run on the jump points only,
+# with the Manhattan distance as the heuristic. The cost is the same as
+# that of the shortest path found by ASTAR with a single-agent MAPPGridState.
+#
+# The jump points of each cell for each direction, except those depending
+# on the goal, are computed once for the grid with NumPy operations on the
+# occupancy array, so a GridMap can answer many queries quickly. GridMaps
+# are cached like MAPPGrids, and getGridMap returns the same one for the
+# same walls.
+
+import heapq
+import itertools
+import numpy as np
+
+from MAPP import MAPPGridState
+
+# The value of the cell (y+oy,x+ox) of the array A at each cell (y,x),
+# and False outside A
+
+def shifted(A,oy,ox):
+    B = np.zeros_like(A)
+    h,w = A.shape
+    B[max(0,-oy):h-max(0,oy),max(0,-ox):w-max(0,ox)] = A[max(0,oy):h-max(0,-oy),max(0,ox):w-max(0,-ox)]
+    return B
+
+class GridMap:
+
+    # The occupancy array free has a border of walls around the grid, so
+    # the cell (x,y) of the grid is free[y+1,x+1].
+
+    def __init__(self,xsize,ysize,walls):
+        self.xsize = xsize
+        self.ysize = ysize
+        free = np.zeros((ysize+2,xsize+2),dtype=bool)
+        free[1:ysize+1,1:xsize+1] = True
+        for x,y in walls:
+            if 0 <= x < xsize and 0 <= y < ysize:
+                free[y+1,x+1] = False
+        self.free = free
+        h,w = free.shape
+
+        # Moving vertically to direction d, a horizontal turn is forced at
+        # a free cell if the cell beside it is free and the cell beside
+        # the previous cell is a wall.
+
+        forced = dict()
+        for d in [1,-1]:
+            forced[d] = free & ((shifted(free,0,-1) & ~shifted(free,-d,-1)) |
+                                (shifted(free,0,1) & ~shifted(free,-d,1)))
+
+        # vjump[d][y,x] is the first row after y to the direction d where
+        # a turn is forced, or -1 if a wall comes first, and vlast[d][y,x]
+        # is the last free row before the wall.
+
+        self.vjump = dict()
+        self.vlast = dict()
+        for d in [1,-1]:
+            jump = np.full((h,w),-1,dtype=np.int32)
+            last = np.tile(np.arange(0,h,dtype=np.int32)[:,None],(1,w))
+            rows = range(h-2,-1,-1) if d == 1 else range(1,h)
+            for y in rows:
+                n = y + d
+                jump[y] = np.where(free[n],np.where(forced[d][n],n,jump[n]),-1)
+                last[y] = np.where(free[n],last[n],y)
+            self.vjump[d] = jump
+            self.vlast[d] = last
+
+        # A cell is a jump point when moving horizontally if a vertical
+        # move from it leads to a forced turn. hjump[d][y,x] is the first
+        # such column after x to the direction d, or -1 if a wall comes
+        # first, and hlast[d][y,x] is the last free column before the wall.
+
+        turn = free & ((self.vjump[1] != -1) | (self.vjump[-1] != -1))
+        self.hjump = dict()
+        self.hlast = dict()
+        for d in [1,-1]:
+            jump = np.full((h,w),-1,dtype=np.int32)
+            last = np.tile(np.arange(0,w,dtype=np.int32)[None,:],(h,1))
+            columns = range(w-2,-1,-1) if d == 1 else range(1,w)
+            for x in columns:
+                n = x + d
+                jump[:,x] = np.where(free[:,n],np.where(turn[:,n],n,jump[:,n]),-1)
+                last[:,x] = np.where(free[:,n],last[:,n],x)
+            self.hjump[d] = jump
+            self.hlast[d] = last
+
+    def isFree(self,x,y):
+        return 0 <= x < self.xsize and 0 <= y < self.ysize and bool(self.free[y+1,x+1])
+
+    # Jump from (y,x) vertically to direction d: the next jump point, the
+    # goal (gy,gx), or None. The coordinates are those of the array free.
+
+    def jumpVertical(self,y,x,d,gy,gx):
+        y1 = int(self.vjump[d][y,x])
+        if gx == x and (gy - y) * d > 0 and (int(self.vlast[d][y,x]) - gy) * d >= 0:
+            if y1 == -1 or (y1 - gy) * d >= 0:
+                return (gy,gx)
+        if y1 == -1:
+            return None
+        return (y1,x)
+
+    # Jump from (y,x) horizontally to direction d. The column of the goal
+    # is a jump point if the goal can be reached from it vertically.
+
+    def jumpHorizontal(self,y,x,d,gy,gx):
+        x1 = int(self.hjump[d][y,x])
+        if (gx - x) * d > 0 and (int(self.hlast[d][y,x]) - gx) * d >= 0:
+            if gy == y:
+                reached = True
+            else:
+                dy = 1 if gy > y else -1
+                reached = (int(self.vlast[dy][y,gx]) - gy) * dy >= 0
+            if reached and (x1 == -1 or (x1 - gx) * d >= 0):
+                return (y,gx)
+        if x1 == -1:
+            return None
+        return (y,x1)
+
+    # The directions to continue to from a jump point reached moving to
+    # the direction (dy,dx), or from the start if the direction is None
+
+    def directions(self,y,x,direction):
+        if direction is None:
+            return [(0,1),(0,-1),(1,0),(-1,0)]
+        dy,dx = direction
+        if dy == 0:
+            return [(0,dx),(1,0),(-1,0)]
+        result = [(dy,0)]
+        free = self.free
+        for s in [1,-1]:
+            if free[y,x+s] and not free[y-dy,x+s]:
+                result.append((0,s))
+        return result
+
+    # A shortest path from start to goal, both (x,y), as the list of the
+    # cells on it, and its length. If there is no path, ([],inf).
+
+    def query(self,start,goal):
+        if not self.isFree(*start) or not self.isFree(*goal):
+            return ([], float("inf"))
+        sy,sx = start[1]+1,start[0]+1
+        gy,gx = goal[1]+1,goal[0]+1
+        counter = itertools.count()
+        initial = ((sy,sx),None)
+        g = { initial : 0 }
+        predecessor = { initial : None }
+        closed = set()
+        OPEN = [ (abs(gy-sy) + abs(gx-sx), 0, next(counter), initial) ]
+        while OPEN:
+            f, mg, n, node = heapq.heappop(OPEN)
+            if node in closed:
+                continue
+            (y,x),direction = node
+            if (y,x) == (gy,gx):
+                return (self.extractPath(predecessor,node), g[node])
+            closed.add(node)
+            for dy,dx in self.directions(y,x,direction):
+                if dy == 0:
+                    cell = self.jumpHorizontal(y,x,dx,gy,gx)
+                else:
+                    cell = self.jumpVertical(y,x,dy,gy,gx)
+                if cell is None:
+                    continue
+                successor = (cell,(dy,dx))
+                new_cost = g[node] + abs(cell[0]-y) + abs(cell[1]-x)
+                if successor in g and g[successor] <= new_cost:
+                    continue
+                g[successor] = new_cost
+                predecessor[successor] = node
+                closed.discard(successor)
+                heapq.heappush(OPEN, (new_cost + abs(gy-cell[0]) + abs(gx-cell[1]), -new_cost, next(counter), successor))
+        return ([], float("inf"))
+
+    # The cells between the jump points, in the coordinates of the grid
+
+    def extractPath(self,predecessor,node):
+        points = []
+        while node is not None:
+            points.append(node[0])
+            node = predecessor[node]
+        points.reverse()
+        path = [ (points[0][1]-1,points[0][0]-1) ]
+        for (y0,x0),(y1,x1) in zip(points,points[1:]):
+            dy = (y1 > y0) - (y1 < y0)
+            dx = (x1 > x0) - (x1 < x0)
+            for i in range(1,abs(y1-y0) + abs(x1-x0) + 1):
+                path.append((x0+i*dx-1,y0+i*dy-1))
+        return path
+
+    # Answer many queries on the same grid: a list of the pairs (path,cost)
+    # for the given list of pairs (start,goal)
+
+    def queries(self,pairs):
+        return [ self.query(start,goal) for start,goal in pairs ]
+
+gridmaps = dict()
+
+def getGridMap(xsize,ysize,walls):
+    k = (xsize,ysize,frozenset(walls))
+    if k not in gridmaps:
+        gridmaps[k] = GridMap(xsize,ysize,walls)
+    return gridmaps[k]
+
+# Solve a single-agent MAPP problem given as the output of createMAPPgrid.
+# Returns (plan,cost) like ASTAR, where plan is a list of MAPPGridStates.
+
+def JPS(initlocations,goallocations,xsize,ysize,walls):
+    path,cost = getGridMap(xsize,ysize,walls).query(initlocations[0],goallocations[0])
+    plan = [ MAPPGridState([ cell ],xsize=xsize,ysize=ysize,walls=walls) for cell in path ]
+    return (plan, float(cost))
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+# A memoizing wrapper for h-functions.
+#
+# ASTAR calls h once for every state it pushes to OPEN, and the same state
+# is often generated again through different paths. If h is expensive,
+# for example a pattern database or a learned function, its values can be
+# remembered by wrapping it:
+#
+#   h = HeuristicCache(MAPPtruedistance(goal),capacity=100000)
+#   plan,cost = ASTAR(initialstate,goaltest,h)
+#   print(h)
+#
+# The states themselves are the keys, so they must have __hash__ and
+# __eq__ like all states used in search. At most 'capacity' values are
+# kept, and when the cache is full, the least recently used value is
+# dropped. With capacity None the cache is unbounded.
+
+from collections import OrderedDict
+
+class HeuristicCache:
+
+    def __init__(self,h,capacity=100000):
+        self.h = h
+        self.capacity = capacity
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return ("HeuristicCache: " + str(self.hits) + " hits, " + str(self.misses) + " misses, " +
+                str(len(self.values)) + " values stored")
+
+    def __call__(self,state):
+        values = self.values
+        if state in values:
+            self.hits += 1
+            values.move_to_end(state)
+            return values[state]
+        self.misses += 1
+        v = self.h(state)
+        values[state] = v
+        if self.capacity is not None and len(values) > self.capacity:
+            values.popitem(last=False)
+        return v
+
+    # Fraction of the calls answered from the cache
+
+    def hitRate(self):
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
+
+    def clear(self):
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
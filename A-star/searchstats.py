@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+# Statistics collected by the search algorithms.
+#
+# An instance of SearchStats can be passed to ASTAR and breadthFirstSearch,
+# and to the breadth-first searches in Knight state/knights.py,
+# with the keyword argument stats. The search then fills in the counters
+# below and returns the statistics object together with its usual result.
+#
+#   expansions      number of states whose successors were computed
+#   generated       number of successor states produced
+#   duplicates      number of generated states that were already known
+#   peakopen        largest size of the OPEN list (A*) or the queue (BFS)
+#   memory          bytes taken by the dictionaries/sets of the search
+#                   (visited, g, predecessor, CLOSED) at the end of the
+#                   search; they only grow, so this is also their peak.
+#                   Only the containers are measured, not the states.
+#   successortime   seconds spent inside successors()
+#   htime           seconds spent inside the h-function
+#   elapsed         seconds for the whole search
+#
+# If a logfile is given, the statistics are appended to it in the
+# JSON lines format (one JSON object per line) when the search ends,
+# so running a sequence of searches produces one line for each.
+
+import sys
+import time
+import json
+
+class SearchStats:
+
+    def __init__(self,logfile=None,label=""):
+        self.logfile = logfile
+        self.label = label
+        self.algorithm = ""
+        self.expansions = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peakopen = 0
+        self.memory = 0
+        self.successortime = 0.0
+        self.htime = 0.0
+        self.elapsed = 0.0
+        self.cost = None
+        self.starttime = None
+
+    def __repr__(self):
+        return (self.algorithm + ": " + str(self.expansions) + " expansions, " +
+                str(self.generated) + " generated, " +
+                str(self.duplicates) + " duplicates, peak OPEN " + str(self.peakopen) +
+                ", " + str(self.memory // 1024) + " KB in tables, " +
+                "successors " + "%.3f" % self.successortime + " s, " +
+                "h " + "%.3f" % self.htime + " s, " +
+                "%.3f" % self.elapsed + " s, " +
+                "%.0f" % self.nodesPerSecond() + " nodes/s")
+
+    # Expansions per second of the whole search
+
+    def nodesPerSecond(self):
+        if self.elapsed > 0:
+            return self.expansions / self.elapsed
+        return 0.0
+
+    # Called by a search algorithm when it starts and ends
+
+    def start(self,algorithm):
+        self.algorithm = algorithm
+        self.starttime = time.perf_counter()
+
+    def finish(self,cost,expansions,generated,duplicates,peakopen,*tables):
+        self.elapsed = time.perf_counter() - self.starttime
+        self.cost = cost
+        self.expansions = expansions
+        self.generated = generated
+        self.duplicates = duplicates
+        self.peakopen = peakopen
+        self.memory = sum(sys.getsizeof(t) for t in tables)
+        if self.logfile is not None:
+            self.write()
+
+    # Successors of a state, with the time spent in successors() recorded
+
+    def successors(self,state):
+        t0 = time.perf_counter()
+        ss = list(state.successors())
+        self.successortime += time.perf_counter() - t0
+        return ss
+
+    # Wrap an h-function so that the time spent in it is recorded
+
+    def timedH(self,h):
+        def timed(state):
+            t0 = time.perf_counter()
+            v = h(state)
+            self.htime += time.perf_counter() - t0
+            return v
+        return timed
+
+    def asDict(self):
+        return { "label" : self.label,
+                 "algorithm" : self.algorithm,
+                 "expansions" : self.expansions,
+                 "generated" : self.generated,
+                 "duplicates" : self.duplicates,
+                 "peakopen" : self.peakopen,
+                 "memory" : self.memory,
+                 "successortime" : self.successortime,
+                 "htime" : self.htime,
+                 "elapsed" : self.elapsed,
+                 "nodespersecond" : self.nodesPerSecond(),
+                 "cost" : self.cost }
+
+    # Append the statistics as one line of JSON to the log file
+
+    def write(self):
+        with open(self.logfile,"a") as f:
+            f.write(json.dumps(self.asDict()) + "\n")
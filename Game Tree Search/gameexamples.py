@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import sys
+import random
 write = sys.stdout.write
 
 # The games are defined in terms of a 'state' class, which represents
@@ -14,9 +15,20 @@ write = sys.stdout.write
 # show() visualizes the state of the game textually.
 # value() returns the numeric value of the state, with small values
 #   good for player 0 and big values good for player 1.
+# key() returns a hashable key identifying the state, used by the
+#   transposition tables of the searches in gametrees.py.
 #
 # The game representation assumes that the players are 0 and 1.
 
+# The keys are Zobrist hashes: every (cell, piece) combination has a
+# random 64-bit number, and the key of a state is the XOR of the numbers
+# of the pieces in it. A move changes the key by XORing out the numbers of
+# the pieces that left a cell and XORing in those of the pieces that
+# entered one, so successor computes the key of the new state in constant
+# time from the key of the old one.
+
+zobristRandom = random.Random(1234567)
+
 # The game of tic tac toe in a 3 by 3 grid
 # grid is represented as a list
 # [ , , ,
@@ -25,9 +37,20 @@ write = sys.stdout.write
 # where -1 denotes that the cell is empty, 0 denotes piece placed
 # by player 0, and denotes piece placed by player 1.
 
+tictactoeKeys = [ [ zobristRandom.getrandbits(64) for player in range(0,2) ] for i in range(0,9) ]
+
 class TicTacToeState:
-  def __init__(self,cs = [-1,-1,-1,-1,-1,-1,-1,-1,-1]):
+  def __init__(self,cs = [-1,-1,-1,-1,-1,-1,-1,-1,-1],zobrist = None):
     self.cells=cs
+    if zobrist is None:
+      zobrist = 0
+      for i in range(0,9):
+        if cs[i] != -1:
+          zobrist ^= tictactoeKeys[i][cs[i]]
+    self.zobrist = zobrist
+
+  def key(self):
+    return self.zobrist
 
   def applicableActions(self,player):
     if self.value() == 0:
@@ -37,7 +60,8 @@ class TicTacToeState:
 
   def successor(self,player,action):
     if self.cells[action] == -1:
-      return TicTacToeState(self.cells[0:action] + [player] + self.cells[action+1:])
+      return TicTacToeState(self.cells[0:action] + [player] + self.cells[action+1:],
+                            self.zobrist ^ tictactoeKeys[action][player])
     else:
       return self
 
@@ -106,8 +130,18 @@ class TicTacToeState:
 #    n denoting reward n for player 1
 # x0,y0,x1,y1: initial locations for player 0 (police) and player 1 (crook)
 
+# The Zobrist numbers of (player,x,y) are created when first needed,
+# because the grids have different sizes.
+
+pursuitKeys = dict()
+
+def pursuitKey(player,x,y):
+  if (player,x,y) not in pursuitKeys:
+    pursuitKeys[(player,x,y)] = zobristRandom.getrandbits(64)
+  return pursuitKeys[(player,x,y)]
+
 class PursuitState:
-  def __init__(self,xm,ym,cells,x0,y0,x1,y1,rewards):
+  def __init__(self,xm,ym,cells,x0,y0,x1,y1,rewards,zobrist = None):
     self.xMax = xm
     self.yMax = ym
     self.grid = cells
@@ -116,6 +150,15 @@ class PursuitState:
     self.x1 = x1
     self.y1 = y1
     self.rewards = rewards
+    if zobrist is None:
+      zobrist = pursuitKey(0,x0,y0) ^ pursuitKey(1,x1,y1)
+    self.zobrist = zobrist
+
+  # The rewards collected so far are a part of the key, because the
+  # values of the states reached from here include them.
+
+  def key(self):
+    return (self.zobrist,self.rewards)
 
   NORTH = 1
   SOUTH = 2
@@ -192,12 +235,14 @@ class PursuitState:
     if player==0:
       if(x==self.x1 and y==self.y1):
         newrewards -= 1000
-      return PursuitState(self.xMax,self.yMax,self.grid,x,y,self.x1,self.y1,newrewards)
+      zobrist = self.zobrist ^ pursuitKey(0,self.x0,self.y0) ^ pursuitKey(0,x,y)
+      return PursuitState(self.xMax,self.yMax,self.grid,x,y,self.x1,self.y1,newrewards,zobrist)
     else:
       if(self.x0==x and self.y0==y):
         newrewards -= 1000
       newrewards += self.grid[y][x]
-      return PursuitState(self.xMax,self.yMax,self.grid,self.x0,self.y0,x,y,newrewards)
+      zobrist = self.zobrist ^ pursuitKey(1,self.x1,self.y1) ^ pursuitKey(1,x,y)
+      return PursuitState(self.xMax,self.yMax,self.grid,self.x0,self.y0,x,y,newrewards,zobrist)
 
   def value(self):
     return self.rewards
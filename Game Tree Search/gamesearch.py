@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+
+# One interface to the game searches in gametrees.py and mcs.py.
+#
+#   result = search(state,player,budget,engine="alphabeta")
+#
+# returns the best action for player in state, its value, the principal
+# variation (the actions of both players, starting with the best action,
+# that the search expects to be played), and the number of nodes searched.
+# A game can then be played with one search per move, see executeWithSearch.
+#
+# The engines and the meaning of the budget:
+#   "minimax"     minimax with a transposition table, budget is the depth
+#   "alphabeta"   iterative deepening alpha-beta, budget is the maximum
+#                 depth, and timeLimit=seconds stops it earlier
+#   "montecarlo"  flat Monte Carlo search, budget is the total number of
+#                 trials, divided evenly among the actions
+#   "mcts"        Monte Carlo Tree Search, budget is the number of trials,
+#                 and timeLimit=seconds stops it earlier, or alone limits
+#                 the search if budget is None. tree=MCTS(...) continues
+#                 the search in an existing tree, whose root is state.
+# Options given to search after the budget are passed to the engine.
+
+import gametrees
+import mcs
+
+class SearchResult:
+  """
+  Result of `search`.
+
+  Attributes
+  ----------
+  action : action of the game, or None
+     Best action, None if there are no applicable actions.
+  value : float
+     Value of the best action.
+  pv : list of actions
+     Principal variation, starting with `action`.
+  nodes : int
+     Number of recursive calls of the tree searches, or number of trials
+     of Monte Carlo searches.
+  depth : int or None
+     Depth of the tree search, None for Monte Carlo searches.
+  visits : dict or None
+     Number of trials for each action of `state` in Monte Carlo Tree Search.
+  """
+
+  def __init__(self,action,value,pv,nodes,depth=None,visits=None):
+    self.action = action
+    self.value = value
+    self.pv = pv
+    self.nodes = nodes
+    self.depth = depth
+    self.visits = visits
+
+  def __repr__(self):
+    s = ("action " + str(self.action) + " value " + str(self.value) + " pv " + str(self.pv) +
+         " nodes " + str(self.nodes) + " depth " + str(self.depth))
+    if self.visits is not None:
+      s += " visits " + str(self.visits)
+    return s
+
+def principalVariation(table,player,state,depth):
+  """
+  Follow the best actions stored in a transposition table from `state`.
+
+  The principal variation ends early if an entry on it has been replaced
+  in the table.
+  """
+  pv = []
+  while len(pv) < depth:
+    a = table.bestAction(table.stateKey(player,state))
+    if a is None or a not in state.applicableActions(player):
+      break
+    pv.append(a)
+    state = state.successor(player,a)
+    player = 1 - player
+  return pv
+
+def minimaxEngine(state,player,budget):
+  table = gametrees.TranspositionTable()
+  calls0 = gametrees.calls
+  v = gametrees.minimaxTT(player,state,budget,table)
+  pv = principalVariation(table,player,state,budget)
+  return SearchResult(pv[0] if pv else None,v,pv,gametrees.calls - calls0,budget)
+
+def alphabetaEngine(state,player,budget,timeLimit=None,table=None):
+  if table is None:
+    table = gametrees.TranspositionTable()
+  calls0 = gametrees.calls
+  a,v,depth = gametrees.iterativeDeepening(player,state,budget,timeLimit,table)
+  pv = principalVariation(table,player,state,depth)
+  return SearchResult(a,v,pv,gametrees.calls - calls0,depth)
+
+def monteCarloEngine(state,player,budget):
+  actions = state.applicableActions(player)
+  if actions == []:
+    return SearchResult(None,state.value(),[],0)
+  trials = max(1,budget // len(actions))
+  bestAction = None
+  for action in actions:
+    v = mcs.monteCarloSearch(1-player,state.successor(player,action),trials)
+    if bestAction is None or (player == 1 and v > bestScore) or (player == 0 and v < bestScore):
+      bestAction = action
+      bestScore = v
+  return SearchResult(bestAction,bestScore,[bestAction],trials * len(actions))
+
+def mctsEngine(state,player,budget,timeLimit=None,tree=None):
+  if tree is None:
+    tree = mcs.MCTS(player,state)
+  n = tree.run(budget,timeLimit)
+  return SearchResult(tree.bestAction(),tree.value(),tree.principalVariation(),n,visits=tree.visitCounts())
+
+ENGINES = {
+  "minimax" : minimaxEngine,
+  "alphabeta" : alphabetaEngine,
+  "montecarlo" : monteCarloEngine,
+  "mcts" : mctsEngine
+}
+
+def search(state,player,budget,engine="alphabeta",**options):
+  """
+  Find the best action for `player` in `state`.
+
+  Parameters
+  ----------
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  player : int in {0,1}
+     0 is the minimizing player, and 1 maximizing.
+  budget : int >= 0, or None
+     Depth or number of trials, depending on the engine. None only for
+     "mcts" with a time limit.
+  engine : str
+     Name of the engine in ENGINES.
+  options
+     Further parameters of the engine, for example timeLimit for "alphabeta".
+
+  Returns
+  -------
+  SearchResult
+     Best action, value, principal variation and number of nodes.
+  """
+  if engine not in ENGINES:
+    raise ValueError("unknown engine " + repr(engine) + ", the engines are " + ", ".join(sorted(ENGINES)))
+  return ENGINES[engine](state,player,budget,**options)
+
+def executeWithSearch(player,state,stepsLeft,budget,engine="alphabeta",**options):
+  """
+  Play a game with one `search` per move, printing successive states.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Player to move first.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  stepsLeft : int >= 0
+     Number of moves to play.
+  budget, engine, options
+     As in `search`.
+
+  Returns
+  -------
+  None
+  """
+  while stepsLeft > 0:
+    state.show()
+    result = search(state,player,budget,engine,**options)
+    if result.action is None:
+      return
+    state = state.successor(player,result.action)
+    player = 1 - player
+    stepsLeft -= 1
@@ -10,6 +10,8 @@
 # by one in the beginning of each recursive call. This variable is
 # also used as part of the evaluation of the implementations.
 
+import time
+
 calls = 0
 
 """
@@ -122,6 +124,399 @@ def alphabeta(player,state,depthLeft,alpha,beta):
 
   return best
 
+# Transposition tables
+#
+# The same state is often reached through different orders of the same
+# moves, and the searches above search it again every time. A transposition
+# table remembers the results of the searches from states, so that a state
+# reached again is not searched again.
+#
+# The results of alphabeta are not always exact: if the search of a state
+# is cut off because the value is at least beta, the value returned is only
+# a lower bound of the real value, and if all values are at most alpha, it
+# is an upper bound. The table records which of the three it is, and an
+# entry can be used to narrow the alpha-beta window if it is not exact.
+#
+# The searches are depth-limited, and the value of a state depends on how
+# deep it is searched, so an entry is used only for a search of the same
+# depth. The best action is used in move ordering by deeper searches, see
+# iterativeDeepening.
+#
+# The table has a fixed number of slots, and a state can only be stored in
+# the slot given by its key. If the slot is used by another state, the
+# entry of the deeper search is kept, because its search took more work.
+#
+# The keys are from key() of the state, see gameexamples.py, or from a key
+# function given to the table for states that do not have key().
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable:
+  """
+  Bounded table of search results, indexed by state and player.
+
+  Parameters
+  ----------
+  size : int > 0
+     Number of slots in the table.
+  key : function from states to hashable values, or None
+     Key of a state. If None, the method key() of the states is used.
+  """
+
+  def __init__(self,size=1048576,key=None):
+    self.size = size
+    self.slots = [None] * size
+    self.key = key
+    self.hits = 0
+    self.stores = 0
+
+  def stateKey(self,player,state):
+    if self.key is None:
+      return (state.key(),player)
+    return (self.key(state),player)
+
+  # An entry is (key,depth,flag,value,action)
+
+  def lookup(self,k,depth):
+    entry = self.slots[hash(k) % self.size]
+    if entry is None or entry[0] != k or entry[1] != depth:
+      return None
+    self.hits += 1
+    return entry
+
+  # The best action of the state from a search of any depth, or None
+
+  def bestAction(self,k):
+    entry = self.slots[hash(k) % self.size]
+    if entry is None or entry[0] != k:
+      return None
+    return entry[4]
+
+  def store(self,k,depth,flag,value,action):
+    i = hash(k) % self.size
+    old = self.slots[i]
+    if old is None or old[0] == k or depth >= old[1]:
+      self.slots[i] = (k,depth,flag,value,action)
+      self.stores += 1
+
+def minimaxTT(player,state,depthLeft,table):
+  """
+  Performs `minimax` with a transposition table.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     0 is the minimizing player, and 1 maximizing.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  depthLeft : int >= 0
+     Maximum number of recursive levels to perform.
+  table : TranspositionTable
+     Results of earlier searches, and where the results are stored.
+
+  Returns
+  -------
+  float
+     Best value.
+  """
+
+  global calls
+  calls += 1
+  if depthLeft == 0:
+    return state.value()
+
+  k = table.stateKey(player,state)
+  entry = table.lookup(k,depthLeft)
+  if entry is not None:
+    return entry[3]
+
+  nextplayer = 1 - player
+  if player == 0:
+    best = float('inf')
+  else:
+    best = -float('inf')
+  bestaction = None
+
+  for a in state.applicableActions(player):
+    state2 = state.successor(player, a)
+    value = minimaxTT(nextplayer, state2, depthLeft-1, table)
+
+    if (player == 0 and value < best) or (player == 1 and value > best):
+      best = value
+      bestaction = a
+
+  table.store(k,depthLeft,EXACT,best,bestaction)
+  return best
+
+def alphabetaTT(player,state,depthLeft,alpha,beta,table):
+  """
+  Performs `alphabeta` with a transposition table.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     0 is the minimizing player, and 1 maximizing.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  depthLeft : int >= 0
+     Maximum number of recursive levels to perform.
+  alpha : float
+     Current alpha cut value.
+  beta : float
+     Current beta cut value.
+  table : TranspositionTable
+     Results of earlier searches, and where the results are stored.
+
+  Returns
+  -------
+  float
+     Best value.
+  """
+
+  global calls
+  calls += 1
+  if depthLeft == 0:
+    return state.value()
+
+  k = table.stateKey(player,state)
+  entry = table.lookup(k,depthLeft)
+  if entry is not None:
+    flag,value = entry[2],entry[3]
+    if flag == EXACT:
+      return value
+    if flag == LOWER:
+      alpha = max(alpha, value)
+    else:
+      beta = min(beta, value)
+    if alpha >= beta:
+      return value
+
+  # The value is exact only if it is strictly inside the window searched
+
+  alpha0 = alpha
+  beta0 = beta
+  nextplayer = 1 - player
+  if player == 0:
+    best = float('inf')
+  else:
+    best = -float('inf')
+  bestaction = None
+
+  for a in state.applicableActions(player):
+    state2 = state.successor(player, a)
+
+    value = alphabetaTT(nextplayer, state2, depthLeft-1, alpha, beta, table)
+
+    if (player == 0 and value < best) or (player == 1 and value > best):
+      best = value
+      bestaction = a
+    if player == 0:
+      beta = min(beta, value)
+    else:
+      alpha = max(alpha, value)
+
+    if alpha >= beta:
+      break
+
+  if best <= alpha0:
+    flag = UPPER
+  elif best >= beta0:
+    flag = LOWER
+  else:
+    flag = EXACT
+  table.store(k,depthLeft,flag,best,bestaction)
+  return best
+
+# Iterative deepening
+#
+# Alpha-beta prunes the most when the best action is searched first,
+# because then the values of the other actions only need to be shown to
+# be worse. The order of the actions is guessed by
+#   - the best action of the state from the previous, shallower search,
+#     found in the transposition table,
+#   - the killer moves: actions that caused a cut-off at the same ply
+#     in another part of the tree, which are often good also here,
+#   - the history heuristic: actions that have caused cut-offs anywhere,
+#     weighted by the depth of the search they were found in.
+# So the search is first done to depth 1, then 2, and so on. Each search
+# orders the actions by the results of the previous ones, and the earlier
+# searches take only a small fraction of the time of the last one.
+#
+# With a time limit, the search is stopped when the time is up, and the
+# result of the deepest search that was completed is returned.
+
+class SearchTimeout(Exception):
+  pass
+
+class MoveOrdering:
+  """
+  Information for ordering the actions in `alphabetaOrdered`.
+
+  Parameters
+  ----------
+  table : TranspositionTable
+     Results of the searches, including the best actions.
+  deadline : float or None
+     Time (as in time.time()) when the search must be stopped.
+  """
+
+  def __init__(self,table,deadline=None):
+    self.table = table
+    self.deadline = deadline
+    self.killers = dict() # ply -> at most 2 actions that caused a cut-off
+    self.history = dict() # (player,action) -> weight of the cut-offs
+
+  def order(self,player,actions,k,ply):
+    first = []
+    best = self.table.bestAction(k)
+    if best in actions:
+      first.append(best)
+    for a in self.killers.get(ply,[]):
+      if a in actions and a not in first:
+        first.append(a)
+    rest = [ a for a in actions if a not in first ]
+    rest.sort(key=lambda a: -self.history.get((player,a),0))
+    return first + rest
+
+  def cutoff(self,player,a,ply,depthLeft):
+    killers = self.killers.setdefault(ply,[])
+    if a not in killers:
+      killers.insert(0,a)
+      del killers[2:]
+    self.history[(player,a)] = self.history.get((player,a),0) + depthLeft * depthLeft
+
+def alphabetaOrdered(player,state,depthLeft,alpha,beta,ply,ordering):
+  """
+  Performs `alphabetaTT` with the actions ordered by `ordering`.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     0 is the minimizing player, and 1 maximizing.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  depthLeft : int >= 0
+     Maximum number of recursive levels to perform.
+  alpha : float
+     Current alpha cut value.
+  beta : float
+     Current beta cut value.
+  ply : int >= 0
+     Number of moves from the root of the search to `state`.
+  ordering : MoveOrdering
+     Transposition table, killer moves and history.
+
+  Returns
+  -------
+  float
+     Best value.
+
+  Raises
+  ------
+  SearchTimeout
+     If the deadline of `ordering` has passed.
+  """
+
+  global calls
+  calls += 1
+  if ordering.deadline is not None and calls % 1024 == 0 and time.time() > ordering.deadline:
+    raise SearchTimeout()
+  if depthLeft == 0:
+    return state.value()
+
+  table = ordering.table
+  k = table.stateKey(player,state)
+  entry = table.lookup(k,depthLeft)
+  if entry is not None:
+    flag,value = entry[2],entry[3]
+    if flag == EXACT:
+      return value
+    if flag == LOWER:
+      alpha = max(alpha, value)
+    else:
+      beta = min(beta, value)
+    if alpha >= beta:
+      return value
+
+  alpha0 = alpha
+  beta0 = beta
+  nextplayer = 1 - player
+  if player == 0:
+    best = float('inf')
+  else:
+    best = -float('inf')
+  bestaction = None
+
+  for a in ordering.order(player,state.applicableActions(player),k,ply):
+    state2 = state.successor(player, a)
+
+    value = alphabetaOrdered(nextplayer, state2, depthLeft-1, alpha, beta, ply+1, ordering)
+
+    if (player == 0 and value < best) or (player == 1 and value > best):
+      best = value
+      bestaction = a
+    if player == 0:
+      beta = min(beta, value)
+    else:
+      alpha = max(alpha, value)
+
+    if alpha >= beta:
+      ordering.cutoff(player,a,ply,depthLeft)
+      break
+
+  if best <= alpha0:
+    flag = UPPER
+  elif best >= beta0:
+    flag = LOWER
+  else:
+    flag = EXACT
+  table.store(k,depthLeft,flag,best,bestaction)
+  return best
+
+def iterativeDeepening(player,state,maxDepth,timeLimit=None,table=None):
+  """
+  Performs `alphabetaOrdered` to depths 1, 2, ..., `maxDepth`.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     0 is the minimizing player, and 1 maximizing.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  maxDepth : int >= 0
+     Depth of the last search.
+  timeLimit : float or None
+     Seconds after which the search is stopped. The search to depth 1
+     is always completed.
+  table : TranspositionTable or None
+     Table to use, for example one from the search of the previous move.
+
+  Returns
+  -------
+  (action, float, int)
+     Best action (None if there are no actions or maxDepth is 0), its value,
+     and the depth of the deepest completed search.
+  """
+
+  start = time.time()
+  if table is None:
+    table = TranspositionTable()
+  ordering = MoveOrdering(table)
+  k = table.stateKey(player,state)
+  result = (None, state.value(), 0)
+  for depth in range(1,maxDepth+1):
+    if timeLimit is not None and depth > 1:
+      ordering.deadline = start + timeLimit
+    try:
+      v = alphabetaOrdered(player,state,depth,0-float("inf"),float("inf"),0,ordering)
+    except SearchTimeout:
+      break
+    result = (table.bestAction(k), v, depth)
+    if timeLimit is not None and time.time() > start + timeLimit:
+      break
+  return result
 
 def gamevalue(startingstate,depth):
   global calls
@@ -132,3 +527,12 @@ def gamevalue(startingstate,depth):
   v = alphabeta(0,startingstate,depth,0-float("inf"),float("inf"))
   print(str(v) + " value with " + str(calls) + " calls with alphabeta to depth " + str(depth))
   calls = 0
+  v = minimaxTT(0,startingstate,depth,TranspositionTable())
+  print(str(v) + " value with " + str(calls) + " calls with minimax and a transposition table to depth " + str(depth))
+  calls = 0
+  v = alphabetaTT(0,startingstate,depth,0-float("inf"),float("inf"),TranspositionTable())
+  print(str(v) + " value with " + str(calls) + " calls with alphabeta and a transposition table to depth " + str(depth))
+  calls = 0
+  a,v,d = iterativeDeepening(0,startingstate,depth)
+  print(str(v) + " value with " + str(calls) + " calls with iterative deepening alphabeta to depth " + str(depth))
+  calls = 0
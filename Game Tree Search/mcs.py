@@ -1,6 +1,9 @@
 #!/usr/bin/python3
 
+import math
+import time
 import random
+import multiprocessing
 
 # Evaluate a state
 # Monte Carlo search: randomly choose actions
@@ -120,3 +123,359 @@ def executeWithMC(player,state,stepsLeft,trials):
       bestScore = v
   state2 = state.successor(player,bestAction)
   executeWithMC(1-player,state2,stepsLeft-1,trials)
+
+### PARALLEL MONTE CARLO SEARCH
+### The trials are independent of each other, so they can be run in
+### several processes at the same time, and only the sums of their values
+### are sent back and added together. There are two ways to divide them:
+###   root parallelism: the trials of each action of the current state form
+###     one task, so the actions are evaluated in parallel,
+###   leaf parallelism: the trials from one state are divided into batches,
+###     so also a single evaluation is done in parallel.
+### Every task seeds the random number generator of the process it runs in
+### with a seed drawn from the generator given by the caller, so the results
+### only depend on that seed, not on the number of processes or on which
+### process runs which task.
+
+def monteCarloBatch(task):
+  """
+  Perform a batch of Monte Carlo Trials in a worker process.
+
+  Parameters
+  ----------
+  task : (int, state, int, int)
+     Player, state, number of trials and the seed of the random numbers.
+
+  Returns
+  -------
+  float
+     Sum of the values of the trials.
+  """
+  player,state,trials,seed = task
+  random.seed(seed)
+  sum = 0
+  for x in range(0,trials):
+    sum += monteCarloTrial(player,state,20)
+  return sum
+
+def parallelMonteCarloSearch(player,state,trials,pool,rng,batches=64):
+  """
+  Perform `monteCarloSearch` with the trials divided into batches that are
+  run in the processes of `pool` (leaf parallelism).
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Current player.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  trials : int > 0
+     Number of Monte Carlo Trials to perform.
+  pool : multiprocessing.Pool
+     Processes running the trials.
+  rng : random.Random
+     Generator of the seeds of the batches.
+  batches : int > 0
+     Number of batches. It should be a few times the number of processes,
+     so that they all have work until the end.
+
+  Returns
+  -------
+  float
+     Average value of the trials.
+  """
+  batches = min(batches,trials)
+  tasks = [ (player,state,trials // batches + (1 if i < trials % batches else 0),rng.getrandbits(64))
+            for i in range(0,batches) ]
+  return sum(pool.map(monteCarloBatch,tasks)) / trials
+
+def parallelRootSearch(player,state,trials,pool,rng):
+  """
+  Evaluate every action of `player` in `state` with `trials` Monte Carlo
+  Trials, one task per action in the processes of `pool` (root parallelism).
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Current player.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  trials : int > 0
+     Number of Monte Carlo Trials for each action.
+  pool : multiprocessing.Pool
+     Processes running the trials.
+  rng : random.Random
+     Generator of the seeds of the tasks.
+
+  Returns
+  -------
+  list of (action, float)
+     Actions and the average values of their trials.
+  """
+  actions = state.applicableActions(player)
+  tasks = [ (1-player,state.successor(player,action),trials,rng.getrandbits(64)) for action in actions ]
+  sums = pool.map(monteCarloBatch,tasks)
+  return [ (action,v / trials) for action,v in zip(actions,sums) ]
+
+def executeWithParallelMC(player,state,stepsLeft,trials,processes=None,seed=0,leaf=False):
+  """
+  Play a game like `executeWithMC`, with the trials run in parallel.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Current player.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  stepsLeft : int >= 0
+     Number of moves to simulate.
+  trials : int > 0
+     Number of Monte Carlo Trials in each sample.
+  processes : int > 0 or None
+     Number of worker processes, by default the number of CPUs.
+  seed : int
+     Seed of the random numbers. The same seed gives the same game.
+  leaf : bool
+     Use leaf parallelism instead of root parallelism.
+
+  Returns
+  -------
+  None
+  """
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  rng = random.Random(seed)
+  with multiprocessing.Pool(processes) as pool:
+    while stepsLeft > 0:
+      state.show()
+      if state.applicableActions(player) == []:
+        return
+      if leaf:
+        values = [ (action,parallelMonteCarloSearch(1-player,state.successor(player,action),trials,pool,rng))
+                   for action in state.applicableActions(player) ]
+      else:
+        values = parallelRootSearch(player,state,trials,pool,rng)
+      if player == 1: # Maximizing player chooses highest score
+        bestAction = max(values,key=lambda av: av[1])[0]
+      else: # Minimizing player chooses lowest score
+        bestAction = min(values,key=lambda av: av[1])[0]
+      state = state.successor(player,bestAction)
+      player = 1 - player
+      stepsLeft -= 1
+
+### MONTE CARLO TREE SEARCH
+### Flat Monte Carlo search spends the same number of trials on every
+### action, also on the ones that are clearly bad, and forgets everything
+### after the move. Monte Carlo Tree Search (MCTS) grows a tree of states
+### from the current state, one node per trial. A trial descends the tree
+### choosing at each node the child with the best UCT score, which is the
+### average value of the trials through the child plus an exploration bonus
+### that grows for children that have been tried less often than their
+### siblings. At the first node with untried actions, one of them is added
+### to the tree, and the trial continues from there with random actions as
+### in monteCarloTrial. The value is then added to all nodes on the path.
+### So the trials concentrate on the most promising actions of both
+### players, and the averages approach the minimax values.
+###
+### The values of the games are not scaled to 0..1 like UCT assumes: the
+### pursuit game has values like -1000 and 3. So the exploration bonus is
+### multiplied by the range of the values seen in the trials so far.
+###
+### After a move is made, the subtree of the action is kept as the new tree,
+### so the trials of the earlier moves are not wasted.
+
+class MCTSNode:
+  """
+  Node of the tree of `MCTS`.
+
+  Attributes
+  ----------
+  state : Object representing game state.
+  player : int in {0,1}
+     Player to move in `state`.
+  parent : MCTSNode or None
+  children : dict
+     Child node for every action that has been tried.
+  untried : list of actions, or None
+     Actions not tried yet, None before the first visit.
+  visits : int
+     Number of trials through the node.
+  total : float
+     Sum of the values of the trials through the node.
+  """
+
+  __slots__ = ("state","player","parent","children","untried","visits","total")
+
+  def __init__(self,state,player,parent=None):
+    self.state = state
+    self.player = player
+    self.parent = parent
+    self.children = dict()
+    self.untried = None
+    self.visits = 0
+    self.total = 0.0
+
+class MCTS:
+  """
+  Monte Carlo Tree Search with the UCT rule, from `state` with `player`
+  to move.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Player to move in `state`.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  c : float
+     Weight of the exploration bonus.
+  steps : int >= 0
+     Maximum number of random moves after the tree in one trial.
+  """
+
+  def __init__(self,player,state,c=1.4,steps=20):
+    self.root = MCTSNode(state,player)
+    self.c = c
+    self.steps = steps
+    self.low = float("inf")   # smallest value of a trial
+    self.high = -float("inf") # largest value of a trial
+    self.playouts = 0
+
+  # The child of node with the best UCT score for the player to move
+
+  def select(self,node):
+    if self.high > self.low:
+      scale = self.high - self.low
+    else:
+      scale = 1.0
+    logN = math.log(node.visits)
+    sign = 1 if node.player == 1 else -1
+    best = None
+    for child in node.children.values():
+      score = sign * child.total / child.visits + self.c * scale * math.sqrt(logN / child.visits)
+      if best is None or score > bestScore:
+        best = child
+        bestScore = score
+    return best
+
+  def playout(self):
+    node = self.root
+    while True:
+      if node.untried is None:
+        node.untried = node.state.applicableActions(node.player)
+        random.shuffle(node.untried)
+      if node.untried or not node.children:
+        break
+      node = self.select(node)
+    if node.untried:
+      action = node.untried.pop()
+      child = MCTSNode(node.state.successor(node.player,action),1-node.player,node)
+      node.children[action] = child
+      node = child
+      value = monteCarloTrial(node.player,node.state,self.steps)
+    else: # no applicable actions
+      value = node.state.value()
+    self.low = min(self.low,value)
+    self.high = max(self.high,value)
+    while node is not None:
+      node.visits += 1
+      node.total += value
+      node = node.parent
+    self.playouts += 1
+
+  def run(self,playouts=None,timeLimit=None):
+    """
+    Perform trials until `playouts` trials have been made or `timeLimit`
+    seconds have passed, whichever comes first.
+
+    Returns
+    -------
+    int
+       Number of trials made.
+    """
+    if playouts is None and timeLimit is None:
+      raise ValueError("MCTS.run needs the number of playouts or a time limit")
+    start = time.time()
+    n = 0
+    while (playouts is None or n < playouts) and (timeLimit is None or time.time() - start < timeLimit):
+      self.playout()
+      n += 1
+    return n
+
+  # The action tried most often is the best one. Its average value is
+  # less affected by the exploration than the best average.
+
+  def bestChild(self,node):
+    best = None
+    for action,child in node.children.items():
+      if best is None or child.visits > best[1].visits:
+        best = (action,child)
+    return best
+
+  def bestAction(self):
+    best = self.bestChild(self.root)
+    if best is None:
+      return None
+    return best[0]
+
+  def value(self):
+    best = self.bestChild(self.root)
+    if best is None:
+      return self.root.state.value()
+    return best[1].total / best[1].visits
+
+  def visitCounts(self):
+    return { action : child.visits for action,child in self.root.children.items() }
+
+  # The actions to the most visited child, from the root down
+
+  def principalVariation(self):
+    pv = []
+    best = self.bestChild(self.root)
+    while best is not None:
+      pv.append(best[0])
+      best = self.bestChild(best[1])
+    return pv
+
+  def advance(self,action):
+    """
+    Make the subtree of `action` the new tree, after `action` has been
+    played in the state of the root.
+    """
+    child = self.root.children.get(action)
+    if child is None:
+      child = MCTSNode(self.root.state.successor(self.root.player,action),1-self.root.player)
+    child.parent = None
+    self.root = child
+
+def executeWithMCTS(player,state,stepsLeft,playouts,timeLimit=None):
+  """
+  Play a game using Monte Carlo Tree Search, printing successive states.
+
+  The tree is kept from one move to the next.
+
+  Parameters
+  ----------
+  player : int in {0,1}
+     Current player.
+  state : Object representing game state.
+     See `gameexamples.py` for examples.
+  stepsLeft : int >= 0
+     Number of moves to simulate.
+  playouts : int > 0 or None
+     Number of trials for each move.
+  timeLimit : float or None
+     Maximum number of seconds for each move.
+
+  Returns
+  -------
+  None
+  """
+  tree = MCTS(player,state)
+  while stepsLeft > 0:
+    tree.root.state.show()
+    tree.run(playouts,timeLimit)
+    action = tree.bestAction()
+    if action is None:
+      return
+    tree.advance(action)
+    stepsLeft -= 1
@@ -56,3 +56,17 @@ testgrid4.show()
 gamevalue(testgrid4,16)
 
 print("CORRECT VALUE for testgrid4: -3998 (Crook is always captured)")
+
+# The same searches through the interface in gamesearch.py, which also
+# returns the best action and the principal variation.
+
+from gamesearch import search
+
+print(search(testgrid2,0,16,engine="minimax"))
+print(search(testgrid2,0,16,engine="alphabeta"))
+
+print("CORRECT VALUE for testgrid2: -3998, with the first action 2 (SOUTH) or 4 (EAST)")
+
+print(search(testgrid3,0,100,engine="alphabeta",timeLimit=1.0))
+
+print("CORRECT VALUE for testgrid3: 0, searched to depth 20 or more in 1 second")
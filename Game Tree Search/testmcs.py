@@ -30,24 +30,52 @@ testgrid4 = PursuitState(3,3,[[ 0, 0, 0, 0],
 
 tictactoe = TicTacToeState();
 
-# Next tests play the games by choosing the next actions according
-# to the most promising action found by Monte Carlo Search.
+# The games are played only when this file is run as a script, not when
+# it is imported, for example by the worker processes of the parallel
+# search when they are started with the spawn method.
 
-print("###################### PLAY TIC TAC TOE ######################")
+if __name__ == "__main__":
 
-executeWithMC(0,tictactoe,12,5000)
+  # Next tests play the games by choosing the next actions according
+  # to the most promising action found by Monte Carlo Search.
 
-print("###################### CHASE IN TEST GRID 1 ######################")
-executeWithMC(0,testgrid1,20,2000)
+  print("###################### PLAY TIC TAC TOE ######################")
 
-print("###################### CHASE IN TEST GRID 2 ######################")
-executeWithMC(0,testgrid2,30,3000)
+  executeWithMC(0,tictactoe,12,5000)
 
-print("###################### CHASE IN TEST GRID 3 ######################")
-executeWithMC(0,testgrid3,30,2000)
+  print("###################### CHASE IN TEST GRID 1 ######################")
+  executeWithMC(0,testgrid1,20,2000)
 
-print("###################### CHASE IN TEST GRID 4 ######################")
-executeWithMC(0,testgrid4,30,2000)
+  print("###################### CHASE IN TEST GRID 2 ######################")
+  executeWithMC(0,testgrid2,30,3000)
+
+  print("###################### CHASE IN TEST GRID 3 ######################")
+  executeWithMC(0,testgrid3,30,2000)
+
+  print("###################### CHASE IN TEST GRID 4 ######################")
+  executeWithMC(0,testgrid4,30,2000)
+
+  # The same games with Monte Carlo Tree Search, which keeps its tree from
+  # one move to the next and uses far fewer trials per move than the flat
+  # search above, which needs 'trials' trials for every action.
+
+  print("###################### PLAY TIC TAC TOE WITH MCTS ######################")
+  executeWithMCTS(0,tictactoe,12,2000)
+
+  print("###################### CHASE IN TEST GRID 2 WITH MCTS ######################")
+  executeWithMCTS(0,testgrid2,30,2000)
+
+  print("###################### CHASE IN TEST GRID 3 WITH MCTS ######################")
+  executeWithMCTS(0,testgrid3,30,2000)
+
+  # The flat Monte Carlo search with the trials run in parallel in all CPUs.
+  # The same seed gives the same game with any number of processes.
+
+  print("###################### CHASE IN TEST GRID 2 IN PARALLEL ######################")
+  executeWithParallelMC(0,testgrid2,30,3000,seed=1)
+
+  print("###################### CHASE IN TEST GRID 3 IN PARALLEL, LEAF ######################")
+  executeWithParallelMC(0,testgrid3,30,2000,seed=1,leaf=True)
 
 # Comments:
 # If both players play optimally, Tic Tac Toe ends in a draw. A basic tree
@@ -57,3 +85,5 @@ executeWithMC(0,testgrid4,30,2000)
 # The pursuit-escape game is played by MCS better. Only in testgrid3 can
 # the crook evade capture by the police. MCS often chooses the best
 # moves for the police, but not always.
+# MCTS plays Tic Tac Toe to a draw with 2000 trials per move, and
+# the police in testgrid2 catch the crook.
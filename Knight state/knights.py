@@ -26,14 +26,78 @@
 
 import time
 import queue
+import os
+import mmap
+import heapq
+import bisect
+import shutil
+import sys
+import tempfile
+from array import array
+
+# The parallel breadth-first search is the one in A-star/BFS.py. The hash
+# values of the states depend only on their bitboards, so they are the
+# same in all its worker processes.
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","A-star"))
+
+from BFS import parallelBFS
+
+# The state is represented by two bitboards, 64-bit integers with one bit
+# for each cell of the board: one for the white knights and one for the
+# black knights. The bit of the cell (x,y) is 8*x+y, so the bits in
+# increasing order are the cells in the lexicographic order of (x,y).
+# The moves of a knight from each cell are computed once, in the order
+# +1+2, +1-2, -1+2, -1-2, +2+1, +2-1, -2+1, -2-1.
+
+knightOffsets = [(1,2),(1,-2),(-1,2),(-1,-2),(2,1),(2,-1),(-2,1),(-2,-1)]
+
+knightMoves = [] # for each cell, the list of the bits of the cells reached
+knightAttacks = [] # for each cell, the bitboard of the cells reached
+
+for cell in range(0,64):
+    x,y = cell // 8,cell % 8
+    bits = [ 1 << (8*(x+dx)+y+dy) for dx,dy in knightOffsets if 0 <= x+dx <= 7 and 0 <= y+dy <= 7 ]
+    knightMoves.append(bits)
+    knightAttacks.append(sum(bits))
+
+# For each row x and each byte of the bitboard for that row, the cells
+# (x,y) in that row and their bits
+
+rowCells = [ [ [ (x,y,1 << (8*x+y)) for y in range(0,8) if (byte >> y) & 1 ] for byte in range(0,256) ] for x in range(0,8) ]
+
+# The 8 symmetries of the board: the rotations and the reflections. A
+# knight move is mapped to a knight move by each of them. For each
+# symmetry, row x and byte of the bitboard for that row, symmetryRows
+# holds the bitboard of the cells those cells are mapped to.
+
+symmetries = [ lambda x,y: (x,y),     lambda x,y: (7-x,y),
+               lambda x,y: (x,7-y),   lambda x,y: (7-x,7-y),
+               lambda x,y: (y,x),     lambda x,y: (7-y,x),
+               lambda x,y: (y,7-x),   lambda x,y: (7-y,7-x) ]
+
+def symmetryRow(f,x,byte):
+    m = 0
+    for x0,y0,bit in rowCells[x][byte]:
+        x1,y1 = f(x0,y0)
+        m |= 1 << (8*x1+y1)
+    return m
+
+symmetryRows = [ [ [ symmetryRow(f,x,byte) for byte in range(0,256) ] for x in range(0,8) ] for f in symmetries ]
+
+def transformMask(k,m):
+    rows = symmetryRows[k]
+    result = 0
+    row = 0
+    while m:
+        result |= rows[row][m & 255]
+        m >>= 8
+        row += 1
+    return result
 
 class KnightState:
 
-    # Construct the canonical state, with knights' coordinates
-    # ordered lexicographically.
-    
-    def canonize(self):
-        self.occupied.sort(key = lambda t: t[0]*1000+t[1])
+    __slots__ = ("white","black")
 
     # Creating a state:
     # initialLocations is a list of triples (x,y,b), where
@@ -41,217 +105,761 @@ class KnightState:
     # iff the knight is black.
     
     def __init__(self,initialLocations):
-        self.occupied = initialLocations
-        self.canonize()
+        self.white = 0
+        self.black = 0
+        for x,y,b in initialLocations:
+            if b:
+                self.black |= 1 << (8*x+y)
+            else:
+                self.white |= 1 << (8*x+y)
+
+    @staticmethod
+    def fromMasks(white,black):
+        state = object.__new__(KnightState)
+        state.white = white
+        state.black = black
+        return state
+
+    # The locations of the knights as triples (x,y,b), ordered
+    # lexicographically by the coordinates. The goal tests compare these
+    # lists.
+
+    @property
+    def occupied(self):
+        black = self.black
+        locations = []
+        m = self.white | black
+        row = 0
+        while m:
+            for x,y,bit in rowCells[row][m & 255]:
+                locations.append((x,y,(black & bit) != 0))
+            m >>= 8
+            row += 1
+        return locations
 
     # Construct a string representing a state.
 
     def __repr__(self):
-        s = ""
-        for x,y,b in self.occupied:
-            if b:
-                color = "B"
-            else:
-                color = "W"
-            s = s + "(" + str(x) + "," + str(y) + "," + color + ")"
-        return s
+        black = self.black
+        s = []
+        m = self.white | black
+        row = 0
+        while m:
+            for x,y,bit in rowCells[row][m & 255]:
+                if black & bit:
+                    s.append("(" + str(x) + "," + str(y) + ",B)")
+                else:
+                    s.append("(" + str(x) + "," + str(y) + ",W)")
+            m >>= 8
+            row += 1
+        return "".join(s)
+
+    # The code of a state, packing the locations of the knights into an
+    # integer. Each knight takes 7 bits, so the code of a state with at
+    # most 9 knights fits in 64 bits and can be stored in an array('Q').
+
+    def encode(self):
+        black = self.black
+        h = 0
+        m = self.white | black
+        row = 0
+        while m:
+            for x,y,bit in rowCells[row][m & 255]:
+                h = 2*(h * 64 + x + 8 * y)+((black & bit) != 0)
+            m >>= 8
+            row += 1
+        return h
+
+    # The state with the code h of n knights
+
+    @staticmethod
+    def decode(h,n):
+        locations = []
+        for i in range(0,n):
+            b = h & 1
+            h = h >> 1
+            locations.append((h % 8,(h // 8) % 8,b == 1))
+            h = h // 64
+        return KnightState(locations)
+
+    # The image of the state under the symmetry k
+
+    def transform(self,k):
+        return KnightState.fromMasks(transformMask(k,self.white),transformMask(k,self.black))
+
+    # The canonical form of the state w.r.t. the symmetries in the list
+    # ks: the image with the smallest bitboards. States that are mapped to
+    # each other by these symmetries have the same canonical form.
+
+    def canonical(self,ks):
+        best = None
+        for k in ks:
+            key = (transformMask(k,self.black),transformMask(k,self.white))
+            if best is None or key < best:
+                best = key
+        return KnightState.fromMasks(best[1],best[0])
 
     # The hash function for states, mapping each state to an integer
 
     def __hash__(self):
-        h = 0
-        for x,y,b in self.occupied:
-            h = 2*(h * 64 + x + 8 * y)+b
-        return h
+        return hash((self.white,self.black))
 
-    # Equality of states. Here we assume that 'canonize' has been
-    # applied when creating each state.
+    # Equality of states. The bitboards are unique for each state.
 
     def __eq__(self,other):
-        return (self.occupied == other.occupied)
+        return (self.white == other.white and self.black == other.black)
 
-    # All successor states w.r.t. a legal knight move
+    # All successor states w.r.t. a legal knight move, to an empty cell.
+    # The knights are moved in the order of their locations.
 
     def successors(self):
-		a  = str(self)
+        a  = str(self)
         final = []
-        
-        for i in self.occupied:
-            temp  = self.occupied.copy()
-            temp.remove(i)
-            
-            s1 = [(i[0]+1, i[1]+2, i[2]),(i[0]+1, i[1]-2, i[2]),(i[0]-1, i[1]+2, i[2]),(i[0]-1, i[1]-2, i[2]), (i[0]+2, i[1]+1, i[2]),(i[0]+2, i[1]-1, i[2]),(i[0]-2, i[1]+1, i[2]),(i[0]-2, i[1]-1, i[2])]
-
-            for j in s1:
-                if((j[0]>=0 and j[0]<=7) and (j[1]>=0 and j[1]<=7)):
-                    if j not in temp:
-                        temp2 = temp.copy()
-                        temp2.append(j)
-                        temp1 = (a,KnightState(temp2)) 
-                        final.append(temp1)
-                
+        white = self.white
+        black = self.black
+        occupied = white | black
+        m = occupied
+        while m:
+            bit = m & -m
+            m ^= bit
+            cell = bit.bit_length() - 1
+            if not knightAttacks[cell] & ~occupied:
+                continue # All cells reached from here are occupied
+            targets = knightMoves[cell]
+            if black & bit:
+                for t in targets:
+                    if not occupied & t:
+                        final.append((a,KnightState.fromMasks(white,black ^ bit ^ t)))
+            else:
+                for t in targets:
+                    if not occupied & t:
+                        final.append((a,KnightState.fromMasks(white ^ bit ^ t,black)))
         return final
 
 
+# Only the predecessor of each visited state is stored, not the path
+# leading to it, so the memory needed is one dictionary entry for each
+# visited state. When the goal is reached, the path is followed back to
+# the initial state and the actions are found from the successors of the
+# states on it.
+
+def actionBetween(state,nextstate):
+    for aname,s in state.successors():
+        if s == nextstate:
+            return aname
+    return None
+
+def extractActions(predecessor,goalstate):
+    states = []
+    state = goalstate
+    while state is not None:
+        states.append(state)
+        state = predecessor[state]
+    states.reverse()
+    return [ actionBetween(s1,s2) for s1,s2 in zip(states,states[1:]) ]
+
 # The following is a standard breadth-first search algorithm, which
 # first finds all states one step from the initial state, then all
 # states two steps from the initial states, and so on.
 # It is guaranteed to find the shortest sequence  of actions that
 # reaches a goal state.
+#
+# The searches return the list of actions, or None if no goal state is
+# reached. Like the searches in A-star/BFS.py, they take a SearchStats
+# object as the keyword argument stats, and then return (path,stats).
 
 DEBUG = False
 
-def breadthFirstSearch(initialstate,goaltest):
+def breadthFirstSearch(initialstate,goaltest,stats=None):
     statExpansions = 0 # number of expanded states
     statVisits = 0 # number of encountered states
+    statGenerated = 0 # number of generated states
+    statDuplicates = 0 # number of generated states that had been visited
+    statPeakQueue = 1 # maximum length of the queue
 
     starttime = time.process_time()
+    if stats is not None:
+        stats.start("BFS")
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
     
-    visited = dict() # dictionary (hash table) for holding visited states
+    predecessor = dict() # dictionary (hash table) for holding visited states and their predecessors
         
     Q = queue.Queue(maxsize=0) # first-in-first-out queue for breadth-first search
 
     print("Initial state is " + str(initialstate))
-    Q.put( (initialstate,[]) ) # Insert the initial state in the queue
+    Q.put(initialstate) # Insert the initial state in the queue
+    predecessor[initialstate] = None
     
-    while not Q.empty():
-        state,path = Q.get() # Next un-expanded state from the queue
+    path = None
+    while path is None and not Q.empty():
+        state = Q.get() # Next un-expanded state from the queue
         if DEBUG:
             print("Expanding state " + str(state))
         statExpansions += 1
-        for aname,s in state.successors(): # Go through all successors of state
-            if s not in visited: # Is state in the dictionary?
+        for aname,s in successors(state): # Go through all successors of state
+            statGenerated += 1
+            if s not in predecessor: # Is state in the dictionary?
                 if DEBUG:
                     print("New state " + str(s))
                 statVisits += 1
+                predecessor[s] = state
                 if goaltest(s):
+                    path = extractActions(predecessor,s)
                     print("Goal state " + str(s) + " reached")
                     endtime = time.process_time()
                     print(str(statExpansions) + " expansions, " + str(statVisits) + " visits")
-                    print(path + [aname])
+                    print(path)
                     print("Elapsed time ",str(endtime-starttime))
                     print()
-                    return
-                visited[s] = 1
-                Q.put( (s,path + [aname] ) )
-    print("All states visited")
-
-
-# The following code runs the breadth-first search algorithm with
-# different initial states and goal states.
-# The goal states are represented by an unnamed function that
-# returns 'true'if the given state is a goal state. All of
-# the functions below have a unique goal state, so the test
-# is simply whether the given state equals the goal state.
-#
-# The last two problem instances take a long time to compute,
-# in the order of 1/2 hour or more. You might want to skip them.
-
-# Swap the locations of two knights
-#
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# WB...... BW......
-
-breadthFirstSearch(KnightState([(0,0,False),(0,1,True)]),
-                   lambda state: (state.occupied == [(0,0,True),(0,1,False)]))
-
-# Move four knights in a 2 by 2 formation 2 steps diagonally
-#
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ..BB....
-# ........ ..BB....
-# BB...... ........
-# BB...... ........
-
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(1,0,True),(1,1,True)]),
-                   lambda state: (state.occupied == [(2,2,True),(2,3,True),(3,2,True),(3,3,True)]))
-
-# Move five knights in a 3+2 formation 2 steps diagonally
-#
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ..BB....
-# ........ ..BBB...
-# BB...... ........
-# BBB..... ........
+                    break
+                Q.put(s)
+            else:
+                statDuplicates += 1
+        statPeakQueue = max(statPeakQueue,Q.qsize())
+    if path is None:
+        print("All states visited")
+    if stats is not None:
+        stats.finish(None if path is None else len(path),statExpansions,statGenerated,statDuplicates,statPeakQueue,predecessor)
+        return (path, stats)
+    return path
+
+
+# Bidirectional breadth-first search proceeds both forward from the initial
+# state and backward from a single goal state. This is possible because
+# every knight move can be reversed: s2 is a successor of s1 iff s1 is a
+# successor of s2. The smaller of the two frontiers is extended by one full
+# layer at a time, and the search ends when a newly reached state has
+# already been reached from the other direction. That state is on a
+# shortest path. For a path of d moves and b successors for each state,
+# roughly 2*b^(d/2) states are reached instead of b^d.
+
+def bidirectionalBFS(initialstate,goalstate,stats=None):
+    statExpansions = 0 # number of expanded states
+    statGenerated = 0 # number of generated states
+    statDuplicates = 0 # number of generated states that had been visited
+    statPeakFrontier = 1 # maximum total length of the two frontiers
 
-print("This probably takes about 20 seconds to solve.\n")
+    starttime = time.process_time()
+    if stats is not None:
+        stats.start("bidirectional BFS")
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
 
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True)]),
-                   lambda state: (state.occupied == [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True)]))
+    forward = { initialstate : None } # state -> predecessor
+    backward = { goalstate : None } # state -> next state towards goal
+    forwardFrontier = [ initialstate ]
+    backwardFrontier = [ goalstate ]
 
-# Move six knights in a 3 by 2 formation 2 steps up and 1 step right
+    print("Initial state is " + str(initialstate))
+    meet = None
+    if initialstate == goalstate:
+        meet = initialstate
+    while meet is None and forwardFrontier and backwardFrontier:
+        isForward = len(forwardFrontier) <= len(backwardFrontier)
+        if isForward:
+            frontier,visited,other = forwardFrontier,forward,backward
+        else:
+            frontier,visited,other = backwardFrontier,backward,forward
+        newFrontier = []
+        for state in frontier:
+            if DEBUG:
+                print("Expanding state " + str(state))
+            statExpansions += 1
+            for aname,s in successors(state):
+                statGenerated += 1
+                if s in visited:
+                    statDuplicates += 1
+                    continue
+                visited[s] = state
+                if s in other:
+                    meet = s
+                    break
+                newFrontier.append(s)
+            if meet is not None:
+                break
+        if isForward:
+            forwardFrontier = newFrontier
+        else:
+            backwardFrontier = newFrontier
+        statPeakFrontier = max(statPeakFrontier,len(forwardFrontier) + len(backwardFrontier))
+
+    if meet is None:
+        print("All states visited")
+        if stats is not None:
+            stats.finish(None,statExpansions,statGenerated,statDuplicates,statPeakFrontier,forward,backward)
+            return (None, stats)
+        return None
+    path = extractActions(forward,meet)
+    state = meet
+    while backward[state] is not None:
+        path.append(actionBetween(state,backward[state]))
+        state = backward[state]
+    endtime = time.process_time()
+    print("Goal state " + str(goalstate) + " reached")
+    print(str(statExpansions) + " expansions, " + str(len(forward) + len(backward)) + " visits")
+    print(path)
+    print("Elapsed time ",str(endtime-starttime))
+    print()
+    if stats is not None:
+        stats.finish(len(path),statExpansions,statGenerated,statDuplicates,statPeakFrontier,forward,backward)
+        return (path, stats)
+    return path
+
+# Breadth-first search that treats states that are symmetric to each
+# other as one state. Only symmetries that map the set of goal states to
+# itself are used, so a state is a goal state iff all its symmetric
+# images are, and the distance to the goal states is the same for all of
+# them. The search is then done with the canonical forms of the states.
+# For a goal set that is symmetric w.r.t. all 8 symmetries the number of
+# visited states is up to 8 times smaller.
 #
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ .BBB....
-# ........ .BBB....
-# BBB..... ........
-# BBB..... ........
+# The plan is found in real coordinates by going through the canonical
+# states on the path from the initial state, and choosing a successor of
+# the current real state whose canonical form is the next canonical state.
+# Because the symmetries preserve the goal set, the last state of the
+# plan is one of the goal states.
+
+def goalSymmetries(goalstates):
+    goals = set(goalstates)
+    return [ k for k in range(0,8) if { g.transform(k) for g in goals } == goals ]
 
-print("This probably takes about 5 seconds to solve.\n")
+def symmetricBFS(initialstate,goalstates,stats=None):
+    statExpansions = 0 # number of expanded states
+    statVisits = 0 # number of encountered states
+    statGenerated = 0 # number of generated states
+    statDuplicates = 0 # number of generated states that had been visited
+    statPeakQueue = 1 # maximum length of the queue
 
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
-                   lambda state: (state.occupied == [(2,1,True),(2,2,True),(2,3,True),(3,1,True),(3,2,True),(3,3,True)]))
+    starttime = time.process_time()
+    if stats is not None:
+        stats.start("symmetric BFS")
+        successors = stats.successors
+    else:
+        successors = lambda state: state.successors()
 
-# Move six knights in a 3 by 2 formation 2 steps diagonally
-#
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ..BBB...
-# ........ ..BBB...
-# BBB..... ........
-# BBB..... ........
+    ks = goalSymmetries(goalstates)
+    goals = { g.canonical(ks) for g in goalstates }
+    start = initialstate.canonical(ks)
 
-print("This probably takes about one minute to solve.\n")
+    predecessor = dict() # canonical states and their canonical predecessors
 
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
-                   lambda state: (state.occupied == [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True),(3,4,True)]))
+    Q = queue.Queue(maxsize=0) # first-in-first-out queue for breadth-first search
 
+    print("Initial state is " + str(initialstate) + ", " + str(len(ks)) + " symmetries")
+    Q.put(start)
+    predecessor[start] = None
 
-# Move six knights in a 3 by 2 formation 3 steps diagonally
+    goal = None
+    if start in goals:
+        goal = start
+    while goal is None and not Q.empty():
+        state = Q.get()
+        if DEBUG:
+            print("Expanding state " + str(state))
+        statExpansions += 1
+        for aname,s in successors(state):
+            statGenerated += 1
+            s = s.canonical(ks)
+            if s not in predecessor:
+                statVisits += 1
+                predecessor[s] = state
+                if s in goals:
+                    goal = s
+                    break
+                Q.put(s)
+            else:
+                statDuplicates += 1
+        statPeakQueue = max(statPeakQueue,Q.qsize())
+
+    if goal is None:
+        print("All states visited")
+        if stats is not None:
+            stats.finish(None,statExpansions,statGenerated,statDuplicates,statPeakQueue,predecessor)
+            return (None, stats)
+        return None
+
+    # The canonical states on the path, and the real states they represent
+
+    canonicals = []
+    state = goal
+    while state is not None:
+        canonicals.append(state)
+        state = predecessor[state]
+    canonicals.reverse()
+    state = initialstate
+    path = []
+    for c in canonicals[1:]:
+        for aname,s in state.successors():
+            if s.canonical(ks) == c:
+                path.append(aname)
+                state = s
+                break
+    endtime = time.process_time()
+    print("Goal state " + str(state) + " reached")
+    print(str(statExpansions) + " expansions, " + str(statVisits) + " visits")
+    print(path)
+    print("Elapsed time ",str(endtime-starttime))
+    print()
+    if stats is not None:
+        stats.finish(len(path),statExpansions,statGenerated,statDuplicates,statPeakQueue,predecessor)
+        return (path, stats)
+    return path
+
+# External-memory breadth-first search, for state spaces that do not fit
+# in the main memory. Each layer of the search, that is, the states at the
+# same distance from the initial state, is stored on disk as a file of the
+# 64-bit codes of the states in increasing order.
+#
+# The next layer is generated by reading the current layer from its file
+# and collecting the codes of the successors in a buffer of 'buffersize'
+# codes. When the buffer is full, it is sorted and written to a run file.
+# The runs are then merged, at most 'fanin' of them at a time, into one
+# sorted sequence without duplicates. Because every knight move can be
+# reversed, a successor of a state in layer d is in layer d-1, d or d+1,
+# so states that have been reached before are removed by comparing the
+# merged sequence with the files of the two previous layers, which are
+# also sorted. All files are read through memory maps, and only the buffer
+# is kept in memory, so the memory needed does not depend on the size of
+# the state space, only the disk space does.
 #
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ ...BBB..
-# ........ ...BBB..
-# ........ ........
-# BBB..... ........
-# BBB..... ........
+# The path to the goal state is found backwards: a predecessor of a state
+# in layer d is one of its successors that is in layer d-1, which is found
+# by binary search in the memory-mapped file of the layer.
+# The files are written in the directory given, or in a temporary
+# directory that is removed at the end.
+
+def codeFile(path):
+    if os.path.getsize(path) == 0:
+        return (None,[])
+    f = open(path,"rb")
+    m = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    f.close()
+    return (m,memoryview(m).cast("Q"))
+
+def closeCodeFile(m,codes):
+    if m is not None:
+        codes.release()
+        m.close()
+
+class CodeWriter:
+
+    def __init__(self,path):
+        self.f = open(path,"wb")
+        self.buffer = array("Q")
+        self.count = 0
+
+    def write(self,h):
+        self.buffer.append(h)
+        self.count += 1
+        if len(self.buffer) >= 65536:
+            self.buffer.tofile(self.f)
+            self.buffer = array("Q")
+
+    def close(self):
+        self.buffer.tofile(self.f)
+        self.f.close()
+
+# Sort the codes in the buffer and write them to a run without duplicates
+
+def writeRun(buffer,path):
+    writer = CodeWriter(path)
+    last = None
+    for h in sorted(buffer):
+        if h != last:
+            writer.write(h)
+            last = h
+    writer.close()
+
+# Merge sorted runs into one sorted run without duplicates. If 'older' is
+# given, codes that occur in any of the sorted files in it are left out,
+# and if 'goaltest' is given, the merging ends at the first goal state,
+# whose code is returned.
+
+def mergeRuns(runs,path,n,older=[],goaltest=None):
+    files = [ codeFile(r) for r in runs ]
+    olds = [ codeFile(r) for r in older ]
+    positions = [ 0 ] * len(olds)
+    writer = CodeWriter(path)
+    goal = None
+    last = None
+    for h in heapq.merge(*[ codes for m,codes in files ]):
+        if h == last:
+            continue
+        last = h
+        seen = False
+        for i,(m,codes) in enumerate(olds):
+            j = positions[i]
+            while j < len(codes) and codes[j] < h:
+                j += 1
+            positions[i] = j
+            if j < len(codes) and codes[j] == h:
+                seen = True
+        if seen:
+            continue
+        writer.write(h)
+        if goaltest is not None and goaltest(KnightState.decode(h,n)):
+            goal = h
+            break
+    writer.close()
+    for m,codes in files + olds:
+        closeCodeFile(m,codes)
+    return (writer.count,goal)
+
+def externalBFS(initialstate,goaltest,directory=None,buffersize=1000000,fanin=64):
+    statExpansions = 0 # number of expanded states
+    statVisits = 0 # number of encountered states
 
-print("This will probably take more than 40 minutes to solve.\n")
+    starttime = time.process_time()
 
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
-                  lambda state: (state.occupied == [(3,3,True),(3,4,True),(3,5,True),(4,3,True),(4,4,True),(4,5,True)]))
+    n = len(initialstate.occupied)
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix="knights")
+    layers = [] # file names of the layers 0,1,2,...
+    nruns = 0
 
-# Move nine knights in a 3 by 3 formation 2 steps up and 1 step left
-#
-# ........ ........
-# ........ ........
-# ........ ........
-# ........ .BBB....
-# ........ .BBB....
-# BBB..... .BBB....
-# BBB..... ........
-# BBB..... ........
-
-print("This will take more than 16 hours and over 200 of GB of memory to solve.\n")
-
-breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True),(2,0,True),(2,1,True),(2,2,True)]),
-                  lambda state: (state.occupied == [(1,2,True),(2,2,True),(3,2,True),(1,3,True),(2,3,True),(3,3,True),(1,4,True),(2,4,True),(3,4,True)]))
+    def newFile():
+        nonlocal nruns
+        nruns += 1
+        return os.path.join(directory,"run" + str(nruns))
+
+    print("Initial state is " + str(initialstate))
+    layers.append(os.path.join(directory,"layer0"))
+    writer = CodeWriter(layers[0])
+    writer.write(initialstate.encode())
+    writer.close()
+
+    goal = None
+    if goaltest(initialstate):
+        goal = initialstate.encode()
+    size = 1
+    while goal is None and size > 0:
+        runs = []
+        buffer = array("Q")
+        m,codes = codeFile(layers[-1])
+        for h in codes:
+            statExpansions += 1
+            for aname,s in KnightState.decode(h,n).successors():
+                buffer.append(s.encode())
+            if len(buffer) >= buffersize:
+                runs.append(newFile())
+                writeRun(buffer,runs[-1])
+                buffer = array("Q")
+        closeCodeFile(m,codes)
+        runs.append(newFile())
+        writeRun(buffer,runs[-1])
+        del buffer
+
+        while len(runs) > fanin:
+            merged = []
+            for i in range(0,len(runs),fanin):
+                merged.append(newFile())
+                mergeRuns(runs[i:i+fanin],merged[-1],n)
+                for r in runs[i:i+fanin]:
+                    os.remove(r)
+            runs = merged
+        layers.append(os.path.join(directory,"layer" + str(len(layers))))
+        size,goal = mergeRuns(runs,layers[-1],n,layers[-3:-1],goaltest)
+        for r in runs:
+            os.remove(r)
+        statVisits += size
+        if DEBUG:
+            print("Layer " + str(len(layers)-1) + ": " + str(size) + " states")
+
+    path = None
+    if goal is None:
+        print("All states visited")
+    else:
+
+        # Follow the predecessors back to the initial state
+
+        state = KnightState.decode(goal,n)
+        path = []
+        for d in range(len(layers)-2,-1,-1):
+            m,codes = codeFile(layers[d])
+            for aname,s in state.successors():
+                h = s.encode()
+                i = bisect.bisect_left(codes,h)
+                if i < len(codes) and codes[i] == h:
+                    path.append(actionBetween(s,state))
+                    state = s
+                    break
+            closeCodeFile(m,codes)
+        path.reverse()
+        endtime = time.process_time()
+        print("Goal state " + str(KnightState.decode(goal,n)) + " reached")
+        print(str(statExpansions) + " expansions, " + str(statVisits) + " visits")
+        print(path)
+        print("Elapsed time ",str(endtime-starttime))
+        print()
+    if temporary:
+        shutil.rmtree(directory)
+    else:
+        for f in layers:
+            os.remove(f)
+    return path
+
+# The examples are run only when this file is run as a script, not when
+# it is imported, for example by the benchmarks or by worker processes.
+
+if __name__ == "__main__":
+
+    # The following code runs the breadth-first search algorithm with
+    # different initial states and goal states.
+    # The goal states are represented by an unnamed function that
+    # returns 'true'if the given state is a goal state. All of
+    # the functions below have a unique goal state, so the test
+    # is simply whether the given state equals the goal state.
+    #
+    # The last two problem instances take a long time to compute,
+    # in the order of 1/2 hour or more. You might want to skip them.
+
+    # Move four knights in a 2 by 2 formation from the corner to the centre
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ...BB...
+    # ........ ...BB...
+    # ........ ........
+    # BB...... ........
+    # BB...... ........
+    #
+    # The goal state is symmetric w.r.t. all 8 symmetries of the board, so
+    # symmetricBFS visits far fewer states than breadthFirstSearch.
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(1,0,True),(1,1,True)]),
+                       lambda state: (state.occupied == [(3,3,True),(3,4,True),(4,3,True),(4,4,True)]))
+
+    symmetricBFS(KnightState([(0,0,True),(0,1,True),(1,0,True),(1,1,True)]),
+                 [ KnightState([(3,3,True),(3,4,True),(4,3,True),(4,4,True)]) ])
+
+    # Swap the locations of two knights
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # WB...... BW......
+
+    breadthFirstSearch(KnightState([(0,0,False),(0,1,True)]),
+                       lambda state: (state.occupied == [(0,0,True),(0,1,False)]))
+
+    # Move four knights in a 2 by 2 formation 2 steps diagonally
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ..BB....
+    # ........ ..BB....
+    # BB...... ........
+    # BB...... ........
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(1,0,True),(1,1,True)]),
+                       lambda state: (state.occupied == [(2,2,True),(2,3,True),(3,2,True),(3,3,True)]))
+
+    # Move five knights in a 3+2 formation 2 steps diagonally
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ..BB....
+    # ........ ..BBB...
+    # BB...... ........
+    # BBB..... ........
+
+    print("This probably takes about 20 seconds to solve.\n")
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True)]),
+                       lambda state: (state.occupied == [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True)]))
+
+    # Move six knights in a 3 by 2 formation 2 steps up and 1 step right
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ .BBB....
+    # ........ .BBB....
+    # BBB..... ........
+    # BBB..... ........
+
+    print("This probably takes about 5 seconds to solve.\n")
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
+                       lambda state: (state.occupied == [(2,1,True),(2,2,True),(2,3,True),(3,1,True),(3,2,True),(3,3,True)]))
+
+    # Move six knights in a 3 by 2 formation 2 steps diagonally
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ..BBB...
+    # ........ ..BBB...
+    # BBB..... ........
+    # BBB..... ........
+
+    print("This probably takes about one minute to solve.\n")
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
+                       lambda state: (state.occupied == [(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True),(3,4,True)]))
+
+
+    # The same problems can be solved much faster by searching also backwards
+    # from the goal state, because the numbers of states reached from the two
+    # ends are far smaller than the number of states reached forward only.
+
+    print("Bidirectional search for the 2 steps diagonally move.\n")
+
+    bidirectionalBFS(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
+                     KnightState([(2,2,True),(2,3,True),(2,4,True),(3,2,True),(3,3,True),(3,4,True)]))
+
+    print("Bidirectional search for the 3 steps diagonally move. This probably takes about one minute.\n")
+
+    bidirectionalBFS(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
+                     KnightState([(3,3,True),(3,4,True),(3,5,True),(4,3,True),(4,4,True),(4,5,True)]))
+
+    # Move six knights in a 3 by 2 formation 3 steps diagonally
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ ...BBB..
+    # ........ ...BBB..
+    # ........ ........
+    # BBB..... ........
+    # BBB..... ........
+
+    print("This will probably take more than 40 minutes to solve.\n")
+
+    breadthFirstSearch(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True)]),
+                      lambda state: (state.occupied == [(3,3,True),(3,4,True),(3,5,True),(4,3,True),(4,4,True),(4,5,True)]))
+
+    # Move nine knights in a 3 by 3 formation 2 steps up and 1 step left
+    #
+    # ........ ........
+    # ........ ........
+    # ........ ........
+    # ........ .BBB....
+    # ........ .BBB....
+    # BBB..... .BBB....
+    # BBB..... ........
+    # BBB..... ........
+
+    # With breadthFirstSearch this takes more than 16 hours and over 200 GB
+    # of memory. externalBFS keeps the states on disk, 8 bytes for each, and
+    # its memory use stays bounded by the size of its buffer.
+
+    print("This will take more than 16 hours and a lot of disk space to solve.\n")
+
+    externalBFS(KnightState([(0,0,True),(0,1,True),(0,2,True),(1,0,True),(1,1,True),(1,2,True),(2,0,True),(2,1,True),(2,2,True)]),
+                      lambda state: (state.occupied == [(1,2,True),(2,2,True),(3,2,True),(1,3,True),(2,3,True),(3,3,True),(1,4,True),(2,4,True),(3,4,True)]))